@@ -1,57 +1,269 @@
+import json
 import os
+import threading
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, abort, render_template, request, jsonify
 
-from main import load_game_config
+from main import load_game_config, load_brain_options, load_mcts_options, generate_player_mapping
+from game import exceptions
+from game.events import follow_events
+from game.metrics import aggregate_metrics, read_game_metrics
+from game.game_controller import Game
+from game.server import MatchServer
+from game.snapshot import BrainSnapshot
 
 app = Flask(__name__)
 
 yaml_location = os.environ['GAME_CONFIG']
 game_config = load_game_config(yaml_location)
 
+MAX_API_DEPTH = 3
 
-@app.route('/')
-@app.route('/index')
-def index():
-    return render_template('index.html')
-
-@app.route('/p1', methods=['GET', 'POST'])
-def p1():
-    player = 'p1'
-    return render_template('players.html', file_data='', player=player)
-
-@app.route('/p2', methods=['GET', 'POST'])
-def p2():
-    player = 'p2'
-    return render_template('players.html', file_data='', player=player)
-
-@app.route('/get_data_p1')
-def get_data_p1():
-    my_player = 'p1'
-    response = {}
-    with open(game_config['players_info'][my_player]['dump_location'], 'r', encoding='utf-8') as f:
-        data = f.read()
-        data = data.replace('<', '&lt;')
-        data = data.replace('>', '&gt;')
-        data = data.replace('\n', '<br>')
-        data = data.replace('\t', '&nbsp;' * 12)
-        response['data'] = data
-    
-    return jsonify(response)
-
-@app.route('/get_data_p2')
-def get_data_p2():
-    my_player = 'p2'
-    response = {}
-    with open(game_config['players_info'][my_player]['dump_location'], 'r', encoding='utf-8') as f:
-        data = f.read()
+
+class DumpCache:
+    """
+        Cache de los dumps de texto ya escapados para HTML y serializados como JSON.\n
+        Cada entrada se identifica por el mtime y el tamaño del archivo, por lo que el archivo
+        solo se vuelve a leer (y escapar) cuando cambia, sin importar cuantos observadores
+        estén consultando el dump.
+
+        Attributes:
+            entries (dict): Ruta del dump -> (mtime, tamaño, etag, payload)
+    """
+    def __init__(self):
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def escape(data: str) -> str:
         data = data.replace('<', '&lt;')
         data = data.replace('>', '&gt;')
         data = data.replace('\n', '<br>')
         data = data.replace('\t', '&nbsp;' * 12)
-        response['data'] = data
-    
-    return jsonify(response)
+        return data
+
+    def get(self, path: str) -> tuple:
+        """
+            Args:
+                path (str): Ruta al dump
+
+            Returns:
+                tuple: etag y payload (JSON con el dump escapado en la clave `data`)
+
+            Raises:
+                FileNotFoundError: Si todavía no existe el dump
+        """
+        with self._lock:  # Los observadores concurrentes comparten una única lectura por cambio
+            stat = os.stat(path)
+            entry = self.entries.get(path)
+            if entry is None or entry[:2] != (stat.st_mtime_ns, stat.st_size):
+                with open(path, 'r', encoding='utf-8') as f:
+                    payload = json.dumps({'data': self.escape(f.read())})
+                entry = (stat.st_mtime_ns, stat.st_size, f'{stat.st_mtime_ns:x}-{stat.st_size:x}', payload)
+                self.entries[path] = entry
+            return entry[2:]
+
+
+dump_cache = DumpCache()
+
+
+@app.route('/')
+@app.route('/index')
+def index():
+    return render_template('index.html', players=game_config['players_info'])
+
+@app.route('/<player>', methods=['GET', 'POST'])
+def player_view(player):
+    if player not in game_config['players_info']:
+        abort(404)
+    return render_template('players.html', file_data='', player=player, dump_format=game_config.get('dump_format', 'text'),
+                           events_enabled=bool(game_config.get('events_location')))
+
+@app.route('/get_data_<player>')
+def get_data(player):
+    """
+        Devuelve el dump de texto de un jugador, escapado para HTML (ver `DumpCache`).\n
+        Soporta GET condicional: si el dump no cambió desde el ETag enviado por el cliente
+        (If-None-Match) se responde 304 sin contenido.\n
+        Con el formato de dump binario los cerebros se consultan por medio de `get_node`.
+    """
+    if player not in game_config['players_info']:
+        return jsonify({'error': f'No existe el jugador <{player}>'}), 404
+    if not game_config['players_info'][player].get('dump_location'):
+        return jsonify({'error': f'El jugador <{player}> no tiene un dump de su cerebro'}), 404
+    if game_config.get('dump_format', 'text') == 'binary':
+        return jsonify({'error': 'El dump es binario, consultarlo por medio de /api/<player>/node'}), 400
+
+    try:
+        etag, payload = dump_cache.get(game_config['players_info'][player]['dump_location'])
+    except FileNotFoundError:
+        return jsonify({'error': 'Todavía no hay un dump del cerebro de este jugador'}), 404
+    except UnicodeDecodeError:
+        return jsonify({'error': 'El dump no es un archivo de texto'}), 400
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/<player>/node')
+def get_node(player):
+    """
+        Devuelve un nodo del cerebro de un jugador CPU junto a sus hijos, en formato JSON.\n
+        Parámetros (query string):\n
+        \t- path: cartas jugadas desde la raiz actual del juego, separadas por coma (por defecto la raiz)\n
+        \t- depth: niveles de descendientes a incluir (por defecto 1, máximo MAX_API_DEPTH)\n
+        \t- offset y limit: paginado de los hijos directos del nodo\n
+        Requiere que el dump de los cerebros se haga en formato binario (dump_format: 'binary').
+    """
+    if player not in game_config['players_info']:
+        return jsonify({'error': f'No existe el jugador <{player}>'}), 404
+    if not game_config['players_info'][player].get('dump_location'):
+        return jsonify({'error': f'El jugador <{player}> no tiene un dump de su cerebro'}), 404
+    if game_config.get('dump_format', 'text') != 'binary':
+        return jsonify({'error': 'La API requiere el formato de dump binario (dump_format: binary)'}), 400
+
+    try:
+        path = [int(card) for card in request.args.get('path', '').split(',') if card]
+        depth = min(int(request.args.get('depth', 1)), MAX_API_DEPTH)
+        offset = int(request.args.get('offset', 0))
+        limit = request.args.get('limit')
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        return jsonify({'error': 'Parámetros invalidos'}), 400
+    if depth < 0 or offset < 0 or (limit is not None and limit < 0):
+        return jsonify({'error': 'Parámetros invalidos'}), 400
+
+    try:
+        with BrainSnapshot(game_config['players_info'][player]['dump_location']) as snapshot:
+            node = snapshot.get(path, depth)
+    except FileNotFoundError:
+        return jsonify({'error': 'Todavía no hay un dump del cerebro de este jugador'}), 404
+    if node is None:
+        return jsonify({'error': f'No existe el nodo {path}'}), 404
+
+    if 'childs' in node:
+        node['childs'] = node['childs'][offset:None if limit is None else offset + limit]
+    node['path'] = path
+    node['child_offset'] = offset
+
+    return jsonify(node)
+
+@app.route('/api/<player>/events')
+def get_events(player):
+    """
+        Stream de eventos de la partida (server-sent events) para la vista de un jugador.\n
+        Se envían las jugadas (`move`), el comienzo y el fin de la partida (`game_start` y `game_over`),
+        y los cambios de la raiz actual del cerebro del jugador (`root`, con el camino de cartas
+        jugadas hasta la nueva raiz), de esta forma el cliente solo vuelve a pedir el dump
+        cuando el mismo cambió.\n
+        Requiere que el juego publique sus eventos (events_location).
+    """
+    if player not in game_config['players_info']:
+        return jsonify({'error': f'No existe el jugador <{player}>'}), 404
+    if not game_config.get('events_location'):
+        return jsonify({'error': 'El juego no publica eventos (events_location)'}), 400
+
+    def stream():
+        for event in follow_events(game_config['events_location']):
+            if event is None:  # Sin eventos por un tiempo, se mantiene viva la conexión
+                yield ': keep-alive\n\n'
+            elif event['type'] != 'root' or event['player'] == player:
+                yield f'event: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+match_server = None
+match_server_lock = threading.Lock()
+
+def get_match_server() -> MatchServer:
+    """
+        Crea (la primera vez que se lo necesita) el servidor de partidas, a partir de la configuración del juego.
+    """
+    global match_server
+    with match_server_lock:
+        if match_server is None:
+            brain_options = load_brain_options(game_config)
+            mcts_options = load_mcts_options(game_config)
+            player_mapping, cpu_players = generate_player_mapping(game_config['players_info'], limit=game_config['limit'], brain_options=brain_options,
+                                                                  mcts_options=mcts_options)
+            game = Game(game_config['limit'], players_name_mapping=player_mapping, cpu_players=cpu_players,
+                        q_cards=game_config['deck_size'], lower_threshold_limit=game_config['lower_threshold_limit'],
+                        higher_threshold_limit=game_config['higher_threshold_limit'], verbose=False, dump_brains=False)
+            match_server = MatchServer(game, brain_options, workers=game_config.get('server_workers'), mcts_options=mcts_options)
+    return match_server
+
+@app.route('/matches', methods=['POST'])
+def create_match():
+    """
+        Crea una nueva partida en el servidor de partidas (ver `game.server.MatchServer`).
+    """
+    return jsonify(get_match_server().create_match().as_dict()), 201
+
+@app.route('/matches/<match_id>', methods=['GET', 'DELETE'])
+def get_match(match_id):
+    server = get_match_server()
+    try:
+        match = server.get_match(match_id)
+    except KeyError:
+        return jsonify({'error': f'No existe la partida <{match_id}>'}), 404
+
+    if request.method == 'DELETE':
+        server.remove_match(match_id)
+        return jsonify({'id': match_id})
+    with match.lock:
+        return jsonify(match.as_dict())
+
+@app.route('/matches/<match_id>/move', methods=['POST'])
+def play_match_move(match_id):
+    """
+        Aplica la jugada de un jugador humano. Recibe un JSON con las claves `player` y `card`.\n
+        Si luego le toca mover a un jugador CPU, su jugada se calcula en segundo plano
+        (consultar la partida hasta que `to_move` vuelva a ser un jugador humano o `finished` sea verdadero).
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        player = str(body['player'])
+        card = int(body['card'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Se esperaba un JSON con las claves player y card'}), 400
+
+    try:
+        match = get_match_server().play(match_id, player, card)
+    except KeyError:
+        return jsonify({'error': f'No existe la partida <{match_id}>'}), 404
+    except (exceptions.WrongOrderError, exceptions.WrongMoveError) as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    with match.lock:
+        return jsonify(match.as_dict())
+
+@app.route('/metrics')
+def get_metrics():
+    """
+        Devuelve las métricas de las partidas (ver `game.metrics`): los resúmenes de las últimas
+        partidas (`?last=N`, 20 por defecto), las métricas agregadas por configuración (de la mas lenta
+        a la mas rápida) y, si el servidor de partidas está corriendo, sus métricas.\n
+        Sin metrics_location solo se devuelven las métricas del servidor de partidas (404 si tampoco está corriendo).
+    """
+    if not game_config.get('metrics_location') and match_server is None:
+        return jsonify({'error': 'Las métricas no están habilitadas (configurar metrics_location o crear una partida en /matches)'}), 404
+    last = request.args.get('last', 20, type=int)
+
+    payload = {}
+    if game_config.get('metrics_location'):
+        summaries = read_game_metrics(game_config['metrics_location'])
+        payload.update({
+            'games': len(summaries),
+            'last': summaries[-last:] if last > 0 else [],
+            'configurations': aggregate_metrics(summaries),
+        })
+    if match_server is not None:
+        payload['server'] = match_server.metrics()
+    return jsonify(payload)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,246 @@
+"""
+    Análisis del espacio de repartos de una configuración.
+
+    Uso:
+
+        $ (env) python -m game.analyze --deck-size 12 --limits 20-62 --workers 4 --output analysis.json
+
+    Para cada limite se evalúan todos los repartos posibles de las cartas (o una muestra estratificada,
+    ver `--sample`), y se informa la probabilidad exacta de que gane el primer jugador y el largo promedio
+    de las partidas, de esta forma los limites (y los umbrales `lower_threshold_limit` y
+    `higher_threshold_limit`) pueden elegirse a partir de datos y no de partidas de prueba.\n
+    Cada reparto se juega con la política de los jugadores CPU que eligen por win rate (ver
+    `game.opening_book.best_moves`), entre cartas empatadas se elige la menor (en una partida real
+    depende del orden de la mano). También se informa el resultado con juego perfecto (valor MiniMax).
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from game.opening_book import MAX_TABLE_SIZE, best_moves
+from game.solver import TranspositionSolver, initial_state, play_card
+
+COUNTERS = ('weight', 'first_wins', 'second_wins', 'draws', 'cards_played', 'minimax_first_wins', 'minimax_draws')
+
+
+def parse_limits(value: str) -> list:
+    """
+        Args:
+            value (str): Limites separados por coma, o un rango inclusivo (por ejemplo `20-60`)
+
+        Returns:
+            list: Limites
+    """
+    if '-' in value:
+        low, high = value.split('-')
+        return list(range(int(low), int(high) + 1))
+    return [int(limit) for limit in value.split(',') if limit.strip()]
+
+
+def count_hands(deck_size: int, q_cards: int) -> list:
+    """
+        Cuenta las manos posibles según la suma de sus cartas, por medio de una programación dinámica.
+
+        Returns:
+            list: Tabla `counts[i][k][s]` con la cantidad de manos de `k` cartas entre las cartas `1..i` que suman `s`
+    """
+    max_sum = deck_size * (deck_size + 1) // 2
+    counts = [[[0] * (max_sum + 1) for _ in range(q_cards + 1)] for _ in range(deck_size + 1)]
+    counts[0][0][0] = 1
+    for card in range(1, deck_size + 1):
+        for k in range(q_cards + 1):
+            for total in range(max_sum + 1):
+                counts[card][k][total] = counts[card - 1][k][total]
+                if k and total >= card:
+                    counts[card][k][total] += counts[card - 1][k - 1][total - card]
+    return counts
+
+
+def sample_hand(counts: list, deck_size: int, q_cards: int, total: int, rnd: random.Random) -> tuple:
+    """
+        Elige de forma uniforme una mano de `q_cards` cartas que sume `total` (ver `count_hands`).
+    """
+    hand = []
+    for card in range(deck_size, 0, -1):
+        if q_cards and total >= card and rnd.random() * counts[card][q_cards][total] < counts[card - 1][q_cards - 1][total - card]:
+            hand.append(card)
+            q_cards -= 1
+            total -= card
+    return tuple(sorted(hand))
+
+
+def select_deals(deck_size: int, sample: int = None, seed: int = 0) -> list:
+    """
+        Selecciona los repartos a evaluar (identificados por la mano del primer jugador).\n
+        Si la cantidad de repartos posibles no supera `sample` se evalúan todos. Si no, se toma una
+        muestra estratificada según la suma de la mano del primer jugador: a cada suma le corresponde
+        una cantidad de repartos proporcional a la cantidad de manos que suman eso (al menos uno), y cada
+        reparto de la muestra pesa la cantidad de manos de su suma sobre la cantidad de repartos elegidos.
+
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+            sample (int): Cantidad aproximada de repartos a evaluar, cada suma recibe al menos uno (None para evaluar todos)
+            seed (int): Semilla de la muestra
+
+        Returns:
+            list: Tuplas `(mano_del_primer_jugador, peso)`
+    """
+    q_cards = deck_size // 2
+    q_deals = math.comb(deck_size, q_cards)
+    if sample is None or q_deals <= sample:
+        return [(hand, 1) for hand in itertools.combinations(range(1, deck_size + 1), q_cards)]
+
+    rnd = random.Random(seed)
+    counts = count_hands(deck_size, q_cards)
+    deals = []
+    for total, stratum_size in enumerate(counts[deck_size][q_cards]):
+        if not stratum_size:
+            continue
+        q_sampled = min(stratum_size, max(1, round(sample * stratum_size / q_deals)))
+        hands = set()
+        while len(hands) < q_sampled:
+            hands.add(sample_hand(counts, deck_size, q_cards, total, rnd))
+        deals.extend((hand, stratum_size / q_sampled) for hand in sorted(hands))
+    return deals
+
+
+def play_out(solver: TranspositionSolver, state: tuple) -> tuple:
+    """
+        Juega una partida desde un estado con la política de los jugadores CPU que eligen por win rate.
+
+        Returns:
+            tuple: `(ganador, cartas_jugadas)`, el ganador es 0 (primer jugador), 1 (segundo jugador) o None
+    """
+    cards_played = 0
+    while True:
+        side = state[3]
+        mover_mask = state[side]
+        if not mover_mask:
+            return None, cards_played  # No quedan cartas por jugar, no hay ganador
+        moves = best_moves(solver, state) or mover_mask  # Sin ganador en ninguna rama, cualquier carta da lo mismo
+        card = (moves & -moves).bit_length() - 1
+        state = play_card(state, card)
+        cards_played += 1
+        if state[2] < 0:
+            return 1 - side, cards_played  # Se pasó del limite, gana el rival
+
+
+def analyze_deals(deck_size: int, limits: list, deals: list) -> dict:
+    """
+        Evalúa un conjunto de repartos para cada limite (es la unidad de trabajo de cada proceso).\n
+        Todos los repartos y limites comparten el mismo solver: los estados solo dependen de las
+        cartas que le quedan a cada jugador y del limite restante.
+
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+            limits (list): Limites a evaluar
+            deals (list): Repartos a evaluar (ver `select_deals`)
+
+        Returns:
+            dict: Contadores ponderados de cada limite (ver `COUNTERS`)
+    """
+    deck = range(1, deck_size + 1)
+    solver = TranspositionSolver([], [], 0)
+    totals = {limit: dict.fromkeys(COUNTERS, 0) for limit in limits}
+    for first_cards, weight in deals:
+        second_cards = [card for card in deck if card not in first_cards]
+        for limit in limits:
+            if len(solver) > MAX_TABLE_SIZE:
+                solver.table = {}
+            state = initial_state(first_cards, second_cards, limit)
+            winner, cards_played = play_out(solver, state)
+            value = solver.evaluate(state)[0]
+
+            counters = totals[limit]
+            counters['weight'] += weight
+            counters['first_wins'] += weight if winner == 0 else 0
+            counters['second_wins'] += weight if winner == 1 else 0
+            counters['draws'] += weight if winner is None else 0
+            counters['cards_played'] += weight * cards_played
+            counters['minimax_first_wins'] += weight if value == 1 else 0
+            counters['minimax_draws'] += weight if value == 0 else 0
+    return totals
+
+
+def analyze(deck_size: int, limits: list, workers: int = 1, sample: int = None, seed: int = 0) -> dict:
+    """
+        Analiza el espacio de repartos de una configuración, repartiendo los repartos entre varios procesos.
+
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+            limits (list): Limites a evaluar
+            workers (int): Cantidad de procesos
+            sample (int): Cantidad aproximada de repartos a evaluar (ver `select_deals`)
+            seed (int): Semilla de la muestra
+
+        Returns:
+            dict: Reporte con los metadatos del análisis y las métricas de cada limite
+    """
+    deals = select_deals(deck_size, sample, seed)
+    chunks = [deals[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(analyze_deals, deck_size, limits, chunk) for chunk in chunks if chunk]
+        partials = [future.result() for future in futures]
+
+    max_sum = sum(range(1, deck_size + 1))
+    results = []
+    for limit in limits:
+        counters = {counter: sum(partial[limit][counter] for partial in partials) for counter in COUNTERS}
+        weight = counters['weight']
+        results.append({
+            'limit': limit,
+            'percentage': ((limit) * (100)) / (max_sum),  # Como en `Game.validate_limit`
+            'first_player_win_probability': counters['first_wins'] / weight,
+            'second_player_win_probability': counters['second_wins'] / weight,
+            'draw_probability': counters['draws'] / weight,
+            'average_game_length': counters['cards_played'] / weight,
+            'minimax_first_player_win_probability': counters['minimax_first_wins'] / weight,
+            'minimax_draw_probability': counters['minimax_draws'] / weight,
+        })
+
+    return {
+        'meta': {
+            'deck_size': deck_size,
+            'deals': math.comb(deck_size, deck_size // 2),
+            'evaluated_deals': len(deals),
+            'sampled': len(deals) < math.comb(deck_size, deck_size // 2),
+            'seed': seed,
+        },
+        'limits': results,
+    }
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='Analiza el balance de cada limite sobre todos los repartos posibles')
+    parser.add_argument('--deck-size', type=int, required=True, help='Cantidad de cartas del mazo')
+    parser.add_argument('--limits', required=True, help='Limites a evaluar, separados por coma o como rango (por ejemplo 20-60)')
+    parser.add_argument('--workers', type=int, default=1, help='Cantidad de procesos')
+    parser.add_argument('--sample', type=int, help='Cantidad aproximada de repartos a evaluar (muestra estratificada si hay mas repartos posibles)')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla de la muestra')
+    parser.add_argument('--output', help='Ruta donde guardar el reporte en formato JSON (por defecto se imprime por consola)')
+    args = parser.parse_args(argv)
+
+    try:
+        limits = parse_limits(args.limits)
+    except ValueError:
+        parser.error(f'Limites invalidos: <{args.limits}>')
+
+    report = analyze(args.deck_size, limits, args.workers, args.sample, args.seed)
+    for result in report['limits']:
+        print(f'limit={result["limit"]} ({result["percentage"]:.1f}%): first player wins {result["first_player_win_probability"]:.3f}, '
+              f'draws {result["draw_probability"]:.3f}, average length {result["average_game_length"]:.2f}', file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file_buffer:
+            json.dump(report, file_buffer, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+    Ejecutor de partidas CPU vs. CPU en lote (sin consola ni dumps de cerebros).
+
+    Uso:
+
+        $ (env) python -m game.batch --games 1000 --workers 8 --json results.json --csv games.csv
+
+    La configuración de la partida se toma del YAML indicado por `--config`
+    (o por la variable de entorno GAME_CONFIG), ambos jugadores deben ser CPU.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from game import exceptions
+from game.game_controller import Game
+from game.metrics import aggregate_metrics
+from main import load_game_config, load_brain_options, load_mcts_options, generate_player_mapping
+
+
+def build_headless_game(game_config: dict) -> Game:
+    """
+        Crea una instancia de `Game` a partir de la configuración, sin salida por
+        consola ni dumps de los cerebros de los jugadores CPU.
+
+        Args:
+            game_config (dict): Configuración del juego (sección `game_config` del YAML)
+
+        Returns:
+            Game: Juego listo para jugar partidas por medio de `Game.play_match()`
+    """
+    brain_options = load_brain_options(game_config)
+    brain_options['verbose'] = False
+    mcts_options = load_mcts_options(game_config)
+    mcts_options['verbose'] = False
+    player_mapping, cpu_players = generate_player_mapping(game_config['players_info'], limit=game_config['limit'], brain_options=brain_options,
+                                                          mcts_options=mcts_options)
+    if len(cpu_players) != len(player_mapping):
+        raise exceptions.WrongGameConfigurationError('El ejecutor en lote solo admite partidas CPU vs. CPU')
+
+    return Game(game_config['limit'], players_name_mapping=player_mapping, cpu_players=cpu_players,
+                q_cards=game_config['deck_size'], lower_threshold_limit=game_config['lower_threshold_limit'],
+                higher_threshold_limit=game_config['higher_threshold_limit'], verbose=False, dump_brains=False)
+
+
+def play_games(game_config: dict, q_games: int, seed: int) -> list:
+    """
+        Juega una cantidad de partidas (es la unidad de trabajo de cada proceso).
+
+        Args:
+            game_config (dict): Configuración del juego
+            q_games (int): Cantidad de partidas a jugar
+            seed (int): Semilla para el reparto de cartas y el orden de los jugadores
+
+        Returns:
+            list: Resultados de cada partida (ver `Game.play_match()`)
+    """
+    random.seed(seed)
+    game = build_headless_game(game_config)
+    return [game.play_match() for _ in range(q_games)]
+
+
+def summarize(results: list, players: list) -> dict:
+    """
+        Calcula las métricas agregadas de un conjunto de partidas.
+
+        Args:
+            results (list): Resultados de cada partida
+            players (list): Ids de los jugadores
+
+        Returns:
+            dict: Métricas agregadas (victorias por jugador, ventaja del primer jugador y largo de las partidas)
+    """
+    q_games = len(results)
+    decided = [result for result in results if result['winner'] is not None]
+    first_player_wins = sum(1 for result in decided if result['winner'] == result['first_player'])
+    lengths = [result['cards_played'] for result in results]
+
+    return {
+        'games': q_games,
+        'draws': q_games - len(decided),
+        'seats': {
+            player: {
+                'wins': sum(1 for result in decided if result['winner'] == player),
+                'win_rate': sum(1 for result in decided if result['winner'] == player) / q_games if q_games else 0,
+                'games_as_first_player': sum(1 for result in results if result['first_player'] == player),
+            } for player in players
+        },
+        'first_player_win_rate': first_player_wins / len(decided) if decided else 0,
+        'game_length': {
+            'mean': sum(lengths) / q_games if q_games else 0,
+            'min': min(lengths, default=0),
+            'max': max(lengths, default=0),
+        },
+    }
+
+
+def run_batch(game_config: dict, q_games: int, workers: int, seed: int) -> list:
+    """
+        Reparte las partidas entre varios procesos y junta sus resultados.
+
+        Returns:
+            list: Resultados de cada partida, en orden
+    """
+    chunks = [q_games // workers + (1 if i < q_games % workers else 0) for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, game_config, chunk, seed + i) for i, chunk in enumerate(chunks) if chunk]
+        return [result for future in futures for result in future.result()]
+
+
+def write_csv(path: str, results: list):
+    with open(path, 'w', newline='', encoding='utf-8') as file_buffer:
+        writer = csv.DictWriter(file_buffer, fieldnames=['game', 'first_player', 'winner', 'turns', 'cards_played', 'mount'], extrasaction='ignore')
+        writer.writeheader()
+        for i, result in enumerate(results):
+            writer.writerow(dict(result, game=i))
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='Ejecuta partidas CPU vs. CPU en lote')
+    parser.add_argument('--config', default=os.environ.get('GAME_CONFIG'), help='Ruta al YAML de configuración (por defecto GAME_CONFIG)')
+    parser.add_argument('--games', type=int, default=100, help='Cantidad de partidas a jugar')
+    parser.add_argument('--workers', type=int, default=1, help='Cantidad de procesos')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla base para los repartos')
+    parser.add_argument('--json', help='Ruta donde guardar el resumen en formato JSON (por defecto se imprime por consola)')
+    parser.add_argument('--csv', help='Ruta donde guardar el resultado de cada partida en formato CSV')
+    args = parser.parse_args(argv)
+    if args.config is None:
+        parser.error('Debe indicar la configuración con --config o con la variable de entorno GAME_CONFIG')
+
+    game_config = load_game_config(args.config)
+    results = run_batch(game_config, args.games, args.workers, args.seed)
+    summary = summarize(results, list(game_config['players_info'].keys()))
+    summary['metrics'] = aggregate_metrics([result['metrics'] for result in results])
+    summary['config'] = {key: value for key, value in game_config.items() if key != 'players_info'}
+
+    if args.csv:
+        write_csv(args.csv, results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file_buffer:
+            json.dump(summary, file_buffer, indent=4)
+    else:
+        json.dump(summary, sys.stdout, indent=4)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+    Suite de benchmarks del motor de los jugadores CPU.
+
+    Uso:
+
+        $ (env) python -m game.benchmark --deck-sizes 6,8,10 --limits 30,50,70 --engines minimax,transposition --output bench.json
+
+    Cada caso (tamaño de mazo, limite porcentual y motor) se ejecuta en un proceso nuevo
+    con un mazo generado a partir de la semilla, por lo que los resultados son reproducibles
+    y el pico de memoria corresponde solo a ese caso.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game.cpu_controller import CPUBrain
+from game.endgame import EndgameTable
+from game.node import Node
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ENGINES = {  # Los casos 'minimax' fijan endgame_cards (solo reglas cerradas), salvo 'minimax-endgame' que usa el valor por defecto
+    'minimax': {'endgame_cards': 0},
+    'minimax-endgame': {'endgame_cards': EndgameTable.DEFAULT_MAX_CARDS},
+    'minimax-compact': {'brain_store': 'compact', 'endgame_cards': 0},
+    'minimax-lazy': {'lazy': True, 'endgame_cards': 0},
+    'transposition': {'search': 'transposition'},
+    'transposition-lazy': {'search': 'transposition', 'lazy': True},
+    'alpha_beta': {'search': 'alpha_beta'},
+    'iterative': {'search': 'iterative', 'move_time_ms': 100},
+    'vectorized': {'search': 'vectorized'},
+}
+
+
+def peak_rss_kb() -> int:
+    """
+        Returns:
+            int: Pico de memoria residente del proceso actual en KB (None si no puede medirse)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def create_deal(deck_size: int, seed: int) -> tuple:
+    """
+        Genera de forma reproducible el reparto de cartas de un caso.
+
+        Returns:
+            tuple: mano del primer jugador y mano del segundo jugador
+    """
+    deck = list(range(1, deck_size + 1))
+    random.Random(seed * 1000 + deck_size).shuffle(deck)
+    return deck[:deck_size // 2], deck[deck_size // 2:]
+
+
+def run_case(deck_size: int, limit_percentage: float, engine: str, seed: int, dump: bool) -> dict:
+    """
+        Ejecuta un caso del benchmark: arma el cerebro de un jugador CPU (que mueve primero),
+        mide el dump de su cerebro y juega una partida completa contra un rival que descarta
+        cartas al azar (con semilla fija), midiendo la latencia de cada jugada.
+
+        Returns:
+            dict: Métricas del caso
+    """
+    first_cards, second_cards = create_deal(deck_size, seed)
+    limit = int(sum(range(1, deck_size + 1)) * limit_percentage / 100)
+
+    with tempfile.TemporaryDirectory() as dump_folder:
+        brain = CPUBrain('p1', Node(None, limit, 0), 'benchmark', os.path.join(dump_folder, 'brain.txt'), verbose=False, **ENGINES[engine])
+        brain.my_cards = list(first_cards)
+
+        start = time.perf_counter()
+        brain.prepare_brain(first_cards, second_cards, 'p1', limit)
+        build_time = time.perf_counter() - start
+        nodes = brain.nodes_count
+        states = len(brain.solver) if brain.solver is not None else None
+
+        dump_time = dump_bytes = None
+        if dump:
+            start = time.perf_counter()
+            brain.dump_brain()
+            dump_time = time.perf_counter() - start
+            dump_bytes = os.path.getsize(brain.dump_dir)
+
+    rival = random.Random(seed)
+    rival_cards = list(second_cards)
+    latencies = []
+    mount = 0
+    last_card = None
+    while brain.my_cards:
+        start = time.perf_counter()
+        last_card = brain.play_a_move(last_card)
+        latencies.append(time.perf_counter() - start)
+        mount += last_card
+        if mount > limit or not rival_cards:
+            break
+        last_card = rival_cards.pop(rival.randrange(len(rival_cards)))
+        mount += last_card
+        if mount > limit:
+            break
+
+    return {
+        'deck_size': deck_size,
+        'limit_percentage': limit_percentage,
+        'limit': limit,
+        'engine': engine,
+        'engine_options': ENGINES[engine],
+        'build_time_s': build_time,
+        'nodes': nodes,
+        'states': states,
+        'peak_rss_kb': peak_rss_kb(),
+        'move_latency_ms': {
+            'mean': sum(latencies) * 1000 / len(latencies),
+            'max': max(latencies) * 1000,
+            'moves': len(latencies),
+        },
+        'dump_time_s': dump_time,
+        'dump_bytes': dump_bytes,
+    }
+
+
+def run_isolated(*args) -> dict:
+    """
+        Ejecuta un caso en un proceso nuevo (y exclusivo), de esta forma
+        el pico de memoria medido corresponde únicamente a ese caso.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(run_case, *args).result()
+
+
+def parse_list(value: str, cast) -> list:
+    return [cast(item) for item in value.split(',') if item]
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='Benchmark del armado del cerebro, las jugadas y el dump de los jugadores CPU')
+    parser.add_argument('--deck-sizes', default='6,8,10', help='Tamaños de mazo, separados por coma')
+    parser.add_argument('--limits', default='30,50,70', help='Limites porcentuales (relativos a la suma de todas las cartas), separados por coma')
+    parser.add_argument('--engines', default='minimax,transposition', help=f'Motores a medir, separados por coma (opciones: {", ".join(ENGINES)})')
+    parser.add_argument('--seed', type=int, default=0, help='Semilla para los repartos')
+    parser.add_argument('--no-dump', action='store_true', help='No medir el dump de los cerebros')
+    parser.add_argument('--output', help='Ruta donde guardar los resultados en formato JSON (por defecto se imprimen por consola)')
+    args = parser.parse_args(argv)
+
+    engines = parse_list(args.engines, str)
+    for engine in engines:
+        if engine not in ENGINES:
+            parser.error(f'Motor desconocido: <{engine}>')
+
+    results = []
+    for deck_size in parse_list(args.deck_sizes, int):
+        for limit_percentage in parse_list(args.limits, float):
+            for engine in engines:
+                result = run_isolated(deck_size, limit_percentage, engine, args.seed, not args.no_dump)
+                print(f'deck_size={deck_size} limit={limit_percentage}% engine={engine}: build {result["build_time_s"]:.4f}s, '
+                      f'{result["nodes"]} nodes, peak {result["peak_rss_kb"]} KB', file=sys.stderr)
+                results.append(result)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file_buffer:
+            json.dump(report, file_buffer, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,16 @@
+import os
 import random
-import copy
+import time
 
-from game.node import Node
+from game import exceptions
+from game.node import MirrorNode, Node
+from game.node_store import NodeStore
+from game.position_cache import PositionCache
+from game.snapshot import write_snapshot
+from game.endgame import EndgameTable
+from game.metrics import BrainMetrics
+from game.opening_book import load_opening_book
+from game.solver import collapse_moves, hand_mask, TranspositionSolver, AlphaBetaSolver, IterativeDeepeningSolver, initial_state, mask_cards, play_card
 
 class CPUBrain:
     """
@@ -35,16 +44,159 @@ class CPUBrain:
                 de una partida
             dump_dir (str): Ruta completa al archivo de dumpeo para trackear el
                 cerebro de este jugador en tiempo real
+            search (str): Motor de búsqueda utilizado para armar el cerebro. Puede ser
+                'minimax' (árbol completo por fuerza bruta), 'transposition'
+                (ver `game.solver.TranspositionSolver`), 'alpha_beta'
+                (ver `game.solver.AlphaBetaSolver`), 'iterative' (ver `game.solver.IterativeDeepeningSolver`)
+                o 'vectorized' (ver `game.vectorized.VectorizedSolver`)
+            solver (TranspositionSolver): Solver de la partida actual (solo para los motores
+                que no arman el árbol completo)
+            players_order (tuple): Ids del primer y segundo jugador de la partida actual
+            hands (tuple): Manos originales del primer y segundo jugador de la partida actual
+            lazy (bool): Si es verdadero, el cerebro no se arma al comienzo de la partida sino
+                que se expande y evalúa solo el subárbol de `current_game_root` a medida que se
+                necesita, descartando las ramas que ya no pueden alcanzarse. Solo reduce la memoria
+                residente: la primera jugada sigue evaluando la partida completa (el motor 'minimax'
+                expande todo el subárbol de la raiz actual y los solvers resuelven todo el juego), por
+                lo que el tiempo hasta la primera jugada no disminuye
+            brain_store (str): Forma de almacenar el árbol del motor 'minimax', puede ser 'objects'
+                (un `Node` por jugada) o 'compact' (ver `game.node_store.NodeStore`)
+            workers (int): Cantidad de procesos utilizados para armar el árbol compacto
+                (ver `game.node_store.NodeStore.build_parallel`)
+            position_cache (PositionCache): Cache persistente de posiciones resueltas, compartido
+                entre partidas (solo aplica al motor 'transposition')
+            verbose (bool): Si es falso, el jugador no imprime nada por consola al jugar
+            node_store (NodeStore): Almacenamiento del árbol compacto (solo con `brain_store` 'compact')
+            dump_max_depth (int): Profundidad máxima (relativa a la raiz actual) del dump del cerebro
+            dump_max_nodes (int): Cantidad máxima de nodos del dump del cerebro
+            dump_format (str): Formato del dump del cerebro, 'text' (texto tabulado) o 'binary'
+                (snapshot binario con acceso directo a cada nodo, ver `game.snapshot`)
+            move_time_ms (int): Tiempo máximo por jugada en milisegundos del motor 'iterative'
+                (None para buscar hasta demostrar el resultado)
+            last_search_depth (int): Profundidad alcanzada en la última búsqueda del motor 'iterative'
+            endgame (EndgameTable): Evaluador de finales del motor 'minimax' (ver `game.endgame.EndgameTable`).
+                Sus finales no dependen del reparto, por lo que se comparte entre partidas
+            metrics (BrainMetrics): Métricas del jugador en la partida actual (ver `game.metrics`)
+            shared_brain (CPUBrain): Jugador CPU rival cuyo cerebro comparte este jugador en la partida actual
+                (ver `self.share_brain()`), None si armó su propio cerebro
+            opening_book (str): Ruta al libro de aperturas de la configuración (ver `game.opening_book`), None si
+                no se utiliza. Solo aplica a los motores que eligen por win rate ('minimax', 'transposition' y 'vectorized')
     """
-    def __init__(self, who_am_i: str, main_root: Node, alias: str, dump_dir: str):
+    SEARCH_ENGINES = ('minimax', 'transposition', 'alpha_beta', 'iterative', 'vectorized')
+    BRAIN_STORES = ('objects', 'compact')
+    DUMP_FORMATS = ('text', 'binary')
+    BOOK_ENGINES = ('minimax', 'transposition', 'vectorized')
+    BOOK_PLIES = 2  # Jugadas de la partida que cubre el libro de aperturas
+
+    def __init__(self, who_am_i: str, main_root: Node, alias: str, dump_dir: str, search: str = 'minimax', lazy: bool = False, brain_store: str = 'objects', workers: int = 1, cache_path: str = None, verbose: bool = True,
+                 dump_max_depth: int = None, dump_max_nodes: int = None, dump_format: str = 'text', move_time_ms: int = None,
+                 endgame_cards: int = EndgameTable.DEFAULT_MAX_CARDS, profile: bool = False, opening_book: str = None):
+        if search not in self.SEARCH_ENGINES:
+            raise exceptions.WrongGameConfigurationError(f'Motor de búsqueda no soportado: <{search}> (opciones: {self.SEARCH_ENGINES})')
+        if brain_store not in self.BRAIN_STORES:
+            raise exceptions.WrongGameConfigurationError(f'Almacenamiento de cerebro no soportado: <{brain_store}> (opciones: {self.BRAIN_STORES})')
+        if brain_store == 'compact' and (search != 'minimax' or lazy):
+            raise exceptions.WrongGameConfigurationError('El almacenamiento compacto solo aplica al motor \'minimax\' sin modo lazy')
+        if workers > 1 and brain_store != 'compact':
+            raise exceptions.WrongGameConfigurationError('El armado en paralelo solo aplica al almacenamiento compacto')
+        if dump_format not in self.DUMP_FORMATS:
+            raise exceptions.WrongGameConfigurationError(f'Formato de dump no soportado: <{dump_format}> (opciones: {self.DUMP_FORMATS})')
+        if move_time_ms is not None and move_time_ms <= 0:
+            raise exceptions.WrongGameConfigurationError('El tiempo por jugada debe ser positivo')
+        if endgame_cards < 0:
+            raise exceptions.WrongGameConfigurationError('La cantidad de cartas de los finales no puede ser negativa')
+        if cache_path and search != 'transposition':
+            raise exceptions.WrongGameConfigurationError('El cache de posiciones (cache_path) solo aplica al motor \'transposition\'')
+        if opening_book is not None and search not in self.BOOK_ENGINES:
+            raise exceptions.WrongGameConfigurationError(f'El libro de aperturas solo aplica a los motores {self.BOOK_ENGINES}')
+        if search == 'vectorized':
+            try:
+                import numpy  # Solo se valida que esté instalado, se utiliza en game.vectorized
+            except ImportError:
+                raise exceptions.WrongGameConfigurationError('El motor \'vectorized\' requiere numpy (pip install numpy)')
+
         self.who_am_i = who_am_i  # Jugador que queremos maximizar (A.K.A Cpu player)
         self.load_heuristic_mapping()
         self.main_root = main_root
         self.my_cards = []
         self.__all_nodes = [self.main_root]
+        self._initial_limit = main_root.mount_count
         self.alias = alias
         self.current_game_root = self.main_root  # Esta es la raiz que se va a ir actualizando durante el transcurso del juego
         self.dump_dir = dump_dir
+        self.search = search
+        self.solver = None
+        self.players_order = None
+        self.hands = None
+        self.lazy = lazy or search == 'iterative'  # El motor 'iterative' siempre crea los nodos a demanda
+        self.brain_store = brain_store
+        self.workers = workers
+        self.position_cache = PositionCache(cache_path) if cache_path else None
+        self.node_store = None
+        self.dump_max_depth = dump_max_depth
+        self.dump_max_nodes = dump_max_nodes
+        self.dump_format = dump_format
+        self._last_dumped_root = None
+        self.verbose = verbose
+        self.move_time_ms = move_time_ms
+        self.last_search_depth = None
+        self.endgame = EndgameTable(endgame_cards)
+        self.metrics = BrainMetrics(profile)
+        self._discarded_nodes = 0  # Nodos descartados en modo lazy, para las métricas
+        self.shared_brain = None
+        self.opening_book = opening_book
+        self._book_line = None  # Cartas jugadas mientras la partida sigue dentro del libro de aperturas
+
+    @property
+    def nodes_count(self) -> int:
+        """
+            Returns:
+                int: Cantidad de nodos del árbol cargados actualmente en el cerebro
+        """
+        if self.node_store is not None:
+            return len(self.node_store)
+        if isinstance(self.main_root, MirrorNode):  # Los nodos son los del árbol del rival
+            return self.shared_brain.nodes_count
+        return len(self.__all_nodes)
+
+    @property
+    def engine(self) -> str:
+        """
+            Returns:
+                str: Descripción del motor del jugador (motor de búsqueda, almacenamiento y modo lazy),
+                    utilizada para agrupar las métricas por configuración
+        """
+        engine = self.search
+        if self.brain_store != 'objects':
+            engine += f'-{self.brain_store}'
+        if self.lazy and self.search != 'iterative':
+            engine += '-lazy'
+        return engine
+
+    def reset(self, limit: int = None):
+        """
+            Reinicia el estado de la partida actual (cerebro, mano, solver y métricas) para jugar una nueva
+            partida con la misma instancia, sin copiarla. El cerebro de la partida anterior queda liberado.\n
+            Se conserva lo que no depende del reparto: el evaluador de finales (`self.endgame`) y el cache
+            de posiciones (`self.position_cache`), que se reutilizan entre partidas.
+
+            Args:
+                limit (int): Limite de la nueva partida (por defecto el de la raiz con la que se creó la instancia)
+        """
+        self.main_root = Node(None, self._initial_limit if limit is None else limit, 0)
+        self.current_game_root = self.main_root
+        self.__all_nodes = [self.main_root]
+        self.my_cards = []
+        self.solver = None
+        self.node_store = None
+        self.players_order = None
+        self.hands = None
+        self.shared_brain = None
+        self._book_line = None
+        self._last_dumped_root = None
+        self.last_search_depth = None
+        self.metrics = BrainMetrics(self.metrics.profile)
+        self._discarded_nodes = 0
 
     def play_a_move(self, last_card: int) -> int:
         """
@@ -57,11 +209,13 @@ class CPUBrain:
             nodo que coresponda. Para esto buscamos entre los hijos del estádo actual, cual de ellos contiene
             el valor de la ultima carta recibida.\n
             \t\tPosteriormente se procede a buscar el mejor hijo posible, esto se hace utilizando la función
-            `self.search_best_child_based_on_win_rate()`. Tal y como el nombre lo explica, se buscará el mejor
-            hijo comparando los valores de ratio de victoria (win_rate).\n
+            `self.search_best_child()`. Con el motor 'alpha_beta' se buscará el mejor hijo en base al valor
+            MiniMax demostrado, con el resto de motores se buscará comparando los valores de ratio de victoria (win_rate).\n
             \t\tUna vez encontrado el mejor hijo, se actualiza el estado de `self.current_game_root` a que sea
             el mejor hijo encontrado, se elimina la opción elegida de nuestra lista de cartas y se devuelve
             la elección tomadá.\n
+            Mientras la partida siga dentro del libro de aperturas, la jugada se toma del libro (ver `self._book_move()`).\n
+            La latencia de cada jugada y el tamaño del cerebro luego de la misma se registran en `self.metrics`.\n
 
             Args:
                 last_card (int): Ultima carta jugada por el jugador adversario, servirá para actualizar
@@ -71,26 +225,164 @@ class CPUBrain:
                 choice (int): Devuelve la elección tomada (devolverá el atributo `Node.data` del mejor_hijo,
                     representando la mejor carta posible a jugar)
         """
-        print(f'{self.alias} - Cards: {self.my_cards}')
+        start = time.perf_counter()
+        if self.verbose:
+            print(f'{self.alias} - Cards: {self.my_cards}')
+        with self.metrics.profiling():
+            book_card = None
+            if self._book_line is not None:
+                book_card = self._book_move(last_card)
+                last_card = None  # Si se salió del libro, el cerebro se armó desde la posición actual
+            best_child = self._choose_move(last_card) if book_card is None else None
+
+        if best_child is None:
+            del self.my_cards[self.my_cards.index(book_card)]
+            if self.verbose:
+                print(f'La mejor jugada es elegir <{book_card}>, según el libro de aperturas')
+            self.metrics.move_latencies_ms.append((time.perf_counter() - start) * 1000)
+            return book_card
+
+        del self.my_cards[self.my_cards.index(best_child.data)]
+        if self.verbose:
+            if self.search == 'alpha_beta':
+                print(f'La mejor jugada es elegir <{best_child.data}>, tiene un valor MiniMax demostrado de {best_child.heuristic_value}')
+            elif self.search == 'iterative':
+                print(f'La mejor jugada es elegir <{best_child.data}>, tiene un valor estimado de {best_child.heuristic_value} (profundidad {self.last_search_depth})')
+            else:
+                print(f'La mejor jugada es elegir <{best_child.data}>, tengo un win rate de {best_child.win_rate}% (W-L: {best_child.wins}-{best_child.loses})')
+        self.metrics.move_latencies_ms.append((time.perf_counter() - start) * 1000)
+        self._observe_brain()
+        return best_child.data  # Retorno la carta que hubiera jugado la cpu
+
+    def _choose_move(self, last_card: int) -> Node:
+        """
+            Sigue la ultima jugada del rival (si la hay) y mueve la raiz actual del juego
+            al mejor hijo (ver `self.play_a_move()`).
+
+            Returns:
+                Node: Mejor hijo, nueva raiz actual del juego
+        """
         if last_card is None:  # Osea, si este jugador es el primero en mover
             # En este caso no tenemos que actualizar la raiz de seguimiento del juego al movimiento anterior del rival
             # puesto que somos los primeros en mover
-            best_child = self.search_best_child_based_on_win_rate()  # Busco el hijo que maximice mis oportunidades de ganar
-        
-            self.current_game_root = best_child  # Muevo el estado del juego al mejor hijo encontrado
+            best_child = self.search_best_child()  # Busco el hijo que maximice mis oportunidades de ganar
+            self._observe_brain()  # En modo lazy este es el pico del cerebro, previo a descartar las ramas que ya no pueden alcanzarse
+
+            self._advance_root(best_child)  # Muevo el estado del juego al mejor hijo encontrado
         else:
-            for child in self.current_game_root.childs:  # Para cada hijo de la raiz del juego actual...
-                if child.data == last_card:  # Me fijo cual es el nodo que le corresponde al ultimo movimiento del rival, en base a los hijos actuales
-                    self.current_game_root = child  # Seteo al estado actual, como la opción que tomo el rival en su ultimo turno
-                    break
+            self._advance_root(self._follow_move(last_card))  # Seteo al estado actual, como la opción que tomo el rival en su ultimo turno
 
-            best_child = self.search_best_child_based_on_win_rate()  # Busco el hijo que maximice mis oportunidades de ganar
-            
-            self.current_game_root = best_child  # Muevo el estado del juego al mejor hijo encontrado
-        
-        del self.my_cards[self.my_cards.index(best_child.data)]
-        print(f'La mejor jugada es elegir <{best_child.data}>, tengo un win rate de {best_child.win_rate}% (W-L: {best_child.wins}-{best_child.loses})')
-        return best_child.data  # Retorno la carta que hubiera jugado la cpu
+            best_child = self.search_best_child()  # Busco el hijo que maximice mis oportunidades de ganar
+            self._observe_brain()
+
+            self._advance_root(best_child)  # Muevo el estado del juego al mejor hijo encontrado
+        return best_child
+
+    def _book_move(self, last_card: int) -> int:
+        """
+            Busca la jugada en el libro de aperturas. Las jugadas del libro son las mejores según el win rate
+            (las mismas que se elegirían con el cerebro completo), y entre las cartas empatadas se elige la primera
+            en el orden de la mano, tal como lo haría `self.search_best_child_based_on_win_rate()`.\n
+            Si la partida sale del libro, se arma el cerebro desde la posición actual (ver `self._leave_book()`).
+
+            Args:
+                last_card (int): Ultima carta jugada por el rival (None si este jugador es el primero en mover)
+
+            Returns:
+                int: Carta a jugar, o None si la partida salió del libro
+        """
+        if last_card is not None:
+            self._book_line.append(last_card)
+        if len(self._book_line) < self.BOOK_PLIES:
+            best_moves = load_opening_book(self.opening_book).best_moves(self.hands[0], self._book_line)
+            if best_moves:
+                card = next(card for card in self.my_cards if best_moves >> card & 1)
+                self._book_line.append(card)
+                return card
+
+        self._leave_book()
+        return None
+
+    def _leave_book(self):
+        """
+            Arma el cerebro desde la posición actual de la partida, tomando a este jugador como el primero
+            en mover y al monto restante como limite (el subárbol de la posición actual es el mismo que el del
+            cerebro armado al comienzo de la partida). La raiz conserva la profundidad de la posición actual.
+        """
+        played_cards = self._book_line
+        self._book_line = None
+        side = len(played_cards) % 2
+        my_cards = [card for card in self.hands[side] if card not in played_cards]
+        rival_cards = [card for card in self.hands[1 - side] if card not in played_cards]
+        limit = self.main_root.mount_count - sum(played_cards)
+
+        self.main_root = Node(None, limit, len(played_cards))
+        self.current_game_root = self.main_root
+        self.__all_nodes = [self.main_root]
+        start = time.perf_counter()
+        self._build_brain(my_cards, rival_cards, self.who_am_i, limit)
+        self.metrics.build_time_s = (self.metrics.build_time_s or 0) + time.perf_counter() - start
+
+    def _observe_brain(self):
+        """
+            Registra en `self.metrics` el tamaño actual del cerebro (nodos cargados, nodos
+            creados y estados del solver).
+        """
+        q_nodes = self.nodes_count
+        self.metrics.observe_nodes(q_nodes, self._discarded_nodes + q_nodes, len(self.solver) if self.solver is not None else None)
+
+    def search_best_child(self) -> Node:
+        """
+            Devuelve el mejor hijo de la raiz actual del juego, utilizando el
+            criterio que corresponde al motor de búsqueda configurado.
+
+            Returns:
+                Node: Mejor hijo
+        """
+        if self.search == 'alpha_beta':
+            return self.search_best_child_based_on_value()
+        if self.search == 'iterative':
+            return self.search_best_child_based_on_iterative_deepening()
+        return self.search_best_child_based_on_win_rate()
+
+    def search_best_child_based_on_value(self) -> Node:
+        """
+            Esta función devuelve el mejor hijo basado en el valor MiniMax demostrado
+            de cada hijo (atributo `Node.heuristic_value`).\n
+            Los hijos se evalúan a demanda, probando primero las cartas mas altas que todavía
+            entran en el limite, y la búsqueda se corta apenas se encuentra una victoria demostrada.
+
+            Returns:
+                Node: Mejor hijo
+        """
+        self._expand(self.current_game_root)
+        best_child = None
+        # Primero las jugadas que entran en el limite, de mayor a menor carta
+        for child in sorted(self.current_game_root.childs, key=lambda child: (child.mount_count >= 0, child.data), reverse=True):
+            self._ensure_node_stats(child)
+            if best_child is None or child.heuristic_value > best_child.heuristic_value:
+                best_child = child
+            if best_child.heuristic_value == self.VALUES[self.who_am_i]:
+                break  # Victoria demostrada, no hace falta seguir evaluando
+
+        return best_child
+
+    def search_best_child_based_on_iterative_deepening(self) -> Node:
+        """
+            Esta función devuelve el mejor hijo encontrado por búsquedas acotadas en profundidad,
+            de profundidad creciente, dentro del tiempo por jugada (`self.move_time_ms`).
+            El valor (demostrado o estimado) de la jugada elegida se guarda en su `Node.heuristic_value`.
+
+            Returns:
+                Node: Mejor hijo
+        """
+        self._expand(self.current_game_root)
+        card, value, self.last_search_depth = self.solver.search(self.current_game_root.state, self.move_time_ms)
+        for child in self.current_game_root.childs:
+            if child.data == card:
+                if child.heuristic_value is None:  # Los nodos terminales ya tienen su valor cargado
+                    child.heuristic_value = value  # El jugador que mueve es este jugador
+                return child
 
     def search_best_child_based_on_win_rate(self) -> Node:
         """
@@ -101,9 +393,11 @@ class CPUBrain:
             Returns:
                 Node: Mejor hijo
         """
+        self._expand(self.current_game_root)
         best_win_rate = float('-inf')
         best_child = None
         for child in self.current_game_root.childs:  # Para cada hijo de la raiz del juego actual...
+            self._ensure_node_stats(child)
             if child.win_rate > best_win_rate:  # Me fijo que hijo me da mas posibilidades de ganar
                 best_win_rate = child.win_rate
                 best_child = child
@@ -130,6 +424,313 @@ class CPUBrain:
             self.VALUES['p2'] = 1
         self.VALUES['n/a'] = 0
 
+    def prepare_brain(self, first_cards: list, second_cards: list, first_player: str, limit: int, shared_with: 'CPUBrain' = None):
+        """
+            Arma el cerebro del jugador CPU para la partida actual (ver `self._build_brain()`), o lo comparte
+            con el jugador CPU rival (ver `self.share_brain()`), registrando el tiempo de armado y el tamaño
+            del cerebro en `self.metrics`. Si la partida comienza dentro del libro de aperturas (`self.opening_book`),
+            no se arma nada hasta salir del libro.
+
+            Args:
+                first_cards (list): mano del primer jugador
+                second_cards (list): mano del segundo jugador
+                first_player (str): Id del primer jugador
+                limit (int): Limite máximo de la partida
+                shared_with (CPUBrain): Jugador CPU rival cuyo cerebro (ya armado para esta partida) se comparte,
+                    None para armar un cerebro propio
+        """
+        start = time.perf_counter()
+        with self.metrics.profiling():
+            in_book = self._open_book(first_cards, second_cards, first_player, limit)  # El cerebro se arma recién al salir del libro
+            if not in_book and shared_with is not None:
+                self.share_brain(shared_with)
+            elif not in_book:
+                self._build_brain(first_cards, second_cards, first_player, limit)
+        self.metrics.build_time_s = time.perf_counter() - start
+        self._observe_brain()
+
+    def _open_book(self, first_cards: list, second_cards: list, first_player: str, limit: int) -> bool:
+        """
+            Si hay un libro de aperturas configurado y el reparto pertenece a su configuración, difiere el armado
+            del cerebro hasta que la partida salga del libro (ver `self._book_move()`).
+
+            Returns:
+                bool: Verdadero si la partida comienza dentro del libro
+        """
+        if self.opening_book is None:
+            return False
+        book = load_opening_book(self.opening_book)
+        if not book.covers(first_cards, second_cards, limit) or not book.best_moves(first_cards, []):
+            return False
+
+        second_player = 'p1' if first_player == 'p2' else 'p2'
+        self.players_order = (first_player, second_player)
+        self.hands = (list(first_cards), list(second_cards))
+        self._book_line = []
+        return True
+
+    def can_share_brain(self, other: 'CPUBrain') -> bool:
+        """
+            Indica si este jugador puede compartir el cerebro del jugador CPU rival (ver `self.share_brain()`).
+            Se requiere que ambos utilicen el mismo motor de búsqueda, almacenamiento y modo lazy. No se comparten el motor
+            'minimax' con almacenamiento 'objects' en modo lazy (cada jugador arma su árbol a demanda) ni el motor 'iterative'
+            (no resuelve la partida al armar el cerebro, busca en cada jugada, y compartir su tabla cambiaría sus elecciones).
+
+            Args:
+                other (CPUBrain): Jugador CPU rival
+
+            Returns:
+                bool: Verdadero si el cerebro puede compartirse
+        """
+        return (type(self) is type(other) and self.search in self.SEARCH_ENGINES and self.search != 'iterative' and self.who_am_i != other.who_am_i
+                and (self.search, self.brain_store, self.lazy, self.opening_book) == (other.search, other.brain_store, other.lazy, other.opening_book)
+                and not (self.search == 'minimax' and self.brain_store == 'objects' and self.lazy))
+
+    def share_brain(self, owner: 'CPUBrain'):
+        """
+            Arma el cerebro del jugador CPU reutilizando el del jugador CPU rival, que ya armó el suyo para la
+            misma partida. De esta forma una partida CPU vs. CPU se resuelve una única vez:\n
+            \t- Motores con solver: los solvers guardan sus valores de forma neutral respecto del jugador
+            (ver `game.solver.TranspositionSolver`), por lo que se comparte el solver y cada jugador crea sus
+            propios nodos, traduciendo los valores a su perspectiva (ver `self._load_node_stats()`)\n
+            \t- 'minimax' con almacenamiento 'compact': se comparte el `NodeStore`, con una vista desde la perspectiva
+            de este jugador (ver `game.node_store.NodeView`)\n
+            \t- 'minimax' con almacenamiento 'objects': se comparte el árbol del rival, leído por medio de
+            `game.node.MirrorNode` (valores heurísticos invertidos y victorias/derrotas intercambiadas). Los nodos
+            resueltos como finales los expande el rival (ver `self._expand()`)\n
+
+            Args:
+                owner (CPUBrain): Jugador CPU rival, con su cerebro ya armado (ver `self.can_share_brain()`)
+        """
+        self.shared_brain = owner
+        self.players_order = owner.players_order
+        self.hands = owner.hands
+        self.solver = owner.solver
+
+        if owner.node_store is not None:
+            self.node_store = owner.node_store
+            self.main_root = self.node_store.view(0, self.players_order.index(self.who_am_i))
+            self.current_game_root = self.main_root
+            self.__all_nodes = []
+            return
+
+        if self.solver is None:  # Motor 'minimax' con almacenamiento 'objects'
+            self.main_root = MirrorNode(owner.main_root)
+            self.current_game_root = self.main_root
+            self.__all_nodes = []
+            return
+
+        self.main_root.state = owner.main_root.state
+        if not self.lazy:
+            self._load_node_stats(self.main_root)
+            self._expand(self.main_root)
+
+    def _build_brain(self, first_cards: list, second_cards: list, first_player: str, limit: int):
+        """
+            Esta función arma el cerebro del jugador CPU para la partida actual,
+            utilizando el motor de búsqueda configurado (`self.search`).\n
+            \t- 'minimax': se generá el árbol completo por medio de `self.simulate_moves()` (o de
+            `NodeStore.build()` si el almacenamiento configurado es 'compact')\n
+            \t- 'transposition': se resuelve la partida con un `TranspositionSolver`, y los nodos
+            del árbol se irán creando a demanda (ver `self._expand()`) con los valores ya resueltos\n
+            \t- 'alpha_beta': se demuestra el valor de la partida con un `AlphaBetaSolver`, los nodos
+            se crean a demanda y sus valores se calculan recién cuando se necesitan para elegir una jugada\n
+            \t- 'iterative': no se resuelve nada en este momento, en cada jugada se busca con un
+            `IterativeDeepeningSolver` dentro del tiempo por jugada\n
+            \t- 'vectorized': igual que 'transposition', pero la partida se resuelve nivel por nivel
+            con un `VectorizedSolver` (NumPy)\n
+            En modo lazy (`self.lazy`) no se arma ni se evalúa nada en este momento, solo se
+            guarda el estado inicial de la partida en `self.main_root`.
+
+            Args:
+                first_cards (list): mano del primer jugador
+                second_cards (list): mano del segundo jugador
+                first_player (str): Id del primer jugador
+                limit (int): Limite máximo de la partida
+        """
+        second_player = 'p1' if first_player == 'p2' else 'p2'
+        self.players_order = (first_player, second_player)
+        self.hands = (list(first_cards), list(second_cards))
+
+        if self.search == 'alpha_beta':
+            self.solver = AlphaBetaSolver(first_cards, second_cards, limit)
+        elif self.search == 'iterative':
+            self.solver = IterativeDeepeningSolver(first_cards, second_cards, limit)
+        elif self.search == 'transposition':
+            self.solver = TranspositionSolver(first_cards, second_cards, limit, cache=self.position_cache)
+        elif self.search == 'vectorized':
+            from game.vectorized import VectorizedSolver  # numpy se importa solo si se usa este motor
+            self.solver = VectorizedSolver(first_cards, second_cards, limit)
+
+        if self.lazy:
+            self.main_root.state = initial_state(first_cards, second_cards, limit)
+            return
+
+        if self.search == 'minimax' and self.brain_store == 'compact':
+            store = NodeStore(self.players_order)
+            self.node_store = store
+            if self.workers > 1:
+                store.build_parallel(first_cards, second_cards, limit, self.workers, depth=self.main_root.depth)
+            else:
+                store.build(first_cards, second_cards, limit, depth=self.main_root.depth)
+            self.main_root = store.view(0, self.players_order.index(self.who_am_i))
+            self.current_game_root = self.main_root
+            self.__all_nodes = []
+            return
+
+        if self.search == 'minimax':
+            self.simulate_moves(self.main_root, first_cards, second_cards, self.main_root.depth, first_player, limit)
+            return
+
+        self.main_root.state = initial_state(first_cards, second_cards, limit)
+        self._load_node_stats(self.main_root)
+        self._expand(self.main_root)
+
+    def _load_node_stats(self, node: Node):
+        """
+            Carga en un nodo los valores resueltos por `self.solver` para su estado,
+            traduciendolos a la perspectiva de este jugador (valor heurístico, victorias y derrotas).
+
+            Args:
+                node (Node): Nodo a completar, debe tener su atributo `state` asignado
+        """
+        value, first_wins, second_wins = self.solver.evaluate(node.state)
+        if self.who_am_i == self.players_order[0]:
+            node.heuristic_value, node.wins, node.loses = value, first_wins, second_wins
+        else:
+            node.heuristic_value, node.wins, node.loses = -value, second_wins, first_wins
+
+        if node.mount_count < 0:  # El jugador que movió se pasó del limite
+            node.how_wins = self.players_order[node.state[3]]
+
+    def _ensure_node_stats(self, node: Node):
+        """
+            Evalúa un nodo si todavía no tiene su valor heurístico calculado.
+
+            Args:
+                node (Node): Nodo a evaluar
+        """
+        if node.heuristic_value is not None:
+            return
+
+        if self.solver is None:  # Motor 'minimax' en modo lazy, se arma el subárbol del nodo
+            self._expand(node)
+        else:
+            self._load_node_stats(node)
+
+    def _create_child(self, node: Node, card: int) -> Node:
+        """
+            Crea y agrega a un nodo el hijo que corresponde a descartar una carta,
+            a partir del estado del nodo.
+
+            Args:
+                node (Node): Nodo padre, debe tener su atributo `state` asignado
+                card (int): Carta descartada
+
+            Returns:
+                Node: Nodo hijo creado
+        """
+        child_state = play_card(node.state, card)
+        current_node = Node(card, child_state[2], node.depth + 1, self.players_order[node.state[3]])
+        current_node.state = child_state
+        if self.solver is not None and (current_node.mount_count < 0 or (self.search in ('transposition', 'vectorized') and not self.lazy)):
+            self._load_node_stats(current_node)  # En el resto de los casos los valores se calculan a demanda
+        node.add_child(current_node)
+        self.__all_nodes.append(current_node)
+
+        return current_node
+
+    def _expand(self, node: Node):
+        """
+            Crea los hijos inmediatos de un nodo a partir de su estado (solo aplica a
+            los motores que no generan el árbol completo, o al modo lazy).\n
+            Los hijos se crean en el mismo orden que lo haría `self.simulate_moves()` (agrupando también
+            las cartas que superan el limite), de esta forma la elección de la mejor jugada es la misma.\n
+            Para el motor 'minimax' (en modo lazy, o en los nodos resueltos por el evaluador de finales)
+            se arma todo el subárbol del nodo con `self.simulate_moves()`.
+
+            Args:
+                node (Node): Nodo a expandir
+        """
+        if isinstance(node, MirrorNode):  # Nodo del árbol compartido, lo expande su dueño (con sus valores)
+            self.shared_brain._expand(node.node)
+            return
+        if node.childs or node.state is None or node.mount_count < 0:
+            return
+
+        side = node.state[3]
+        current_moves = mask_cards(self.hands[side], node.state[side])
+        if self.solver is None:
+            next_moves = mask_cards(self.hands[1 - side], node.state[1 - side])
+            node.wins = node.loses = 0  # Los nodos resueltos como finales ya tienen sus victorias cargadas
+            self.simulate_moves(node, current_moves, next_moves, node.depth, self.players_order[side], node.mount_count)
+            return
+
+        positions, q_dead = collapse_moves(current_moves, node.mount_count)
+        for i in positions:
+            child = self._create_child(node, current_moves[i])
+            if child.mount_count < 0:  # Representa a todas las cartas que superan el limite
+                child.wins *= q_dead
+                child.loses *= q_dead
+
+    def _follow_move(self, card: int) -> Node:
+        """
+            Devuelve el hijo de la raiz actual del juego que corresponde a una carta jugada por el rival.
+            Si la carta supera el limite, y no es la que representa a esas jugadas, se devuelve el nodo representante.\n
+            En modo lazy, si la raiz actual todavía no fue expandida, solo se crea el nodo de la
+            carta jugada (sus hermanos ya no pueden alcanzarse).
+
+            Args:
+                card (int): Carta jugada por el rival
+
+            Returns:
+                Node: Nodo de la jugada del rival
+        """
+        if self.lazy and not self.current_game_root.childs and self.current_game_root.state is not None:
+            return self._create_child(self.current_game_root, card)
+
+        self._expand(self.current_game_root)
+        for child in self.current_game_root.childs:  # Para cada hijo de la raiz del juego actual...
+            if child.data == card:  # Me fijo cual es el nodo que le corresponde al ultimo movimiento del rival, en base a los hijos actuales
+                return child
+        if card > self.current_game_root.mount_count:  # Carta equivalente a la del nodo que representa a las que superan el limite
+            for child in self.current_game_root.childs:
+                if child.mount_count < 0:
+                    return child
+        return self.current_game_root
+
+    def _advance_root(self, node: Node):
+        """
+            Mueve la raiz actual del juego (`self.current_game_root`) a uno de sus hijos.\n
+            En modo lazy se descartan los hermanos del nodo (y los estados resueltos que
+            ya no pueden alcanzarse), de esta forma la memoria utilizada escala con lo que
+            resta de la partida. Los nodos cargados pasan a ser los del subárbol del nodo,
+            que sigue en memoria (en el motor 'minimax' es el subárbol armado por `self.simulate_moves()`).
+
+            Args:
+                node (Node): Nueva raiz actual del juego
+        """
+        if self.lazy and node is not self.current_game_root:
+            self.current_game_root.childs = [node]
+            retained_nodes = self._subtree_nodes(node)
+            self._discarded_nodes += len(self.__all_nodes) - len(retained_nodes)
+            self.__all_nodes = retained_nodes
+            if self.solver is not None:
+                self.solver.discard_unreachable(node.state)
+
+        self.current_game_root = node
+
+    @staticmethod
+    def _subtree_nodes(root: Node) -> list:
+        """
+            Returns:
+                list: Nodos del subárbol de un nodo (incluyendo al nodo)
+        """
+        nodes = [root]
+        for node in nodes:  # La lista crece a medida que se recorre
+            nodes.extend(node.childs)
+        return nodes
+
     def simulate_moves(self, root: Node, current_moves: list, next_moves: list, depth: int, how_moves: str, limit: int):
         """
             Esta es la función que generá todas las posibles jugadas para un juego en concreto.\n
@@ -145,7 +746,9 @@ class CPUBrain:
             \t1. Primero se tendrá una clausula de terminación de recursión (puesto que esta clase fue implementada
             para su uso recursivo)\n
             \t2. En caso de que no se accede a la clausula de terminación, en principio se generarán todos los
-            nodos/momentos/jugadas en base a las manos recibidas como parámetro. Es importante tener en cuenta,
+            nodos/momentos/jugadas en base a las manos recibidas como parámetro. Las manos se modifican en el lugar
+            (se quita la carta jugada antes de bajar en la rama y se la vuelve a insertar en su posición al terminarla),
+            de esta forma no se copia la mano por cada jugada y, al finalizar, las manos quedan tal como se recibieron. Es importante tener en cuenta,
             que los parámetros `current_values` y `next_moves` representan las manos del jugador actual y
             del proximo jugador, esto nos dice que es importante la correcta elección de estas 2 variables
             en el momento de callear esta función.\n
@@ -154,6 +757,14 @@ class CPUBrain:
             siempre conforme a esta instancia\n
             \t4. Una vez creados todos los movimientos, se aplica el calculo heurístico sobre la raiz actual
             en base a sus hijos, también se actualizan las métricas de win y lose en la raiz actual.\n
+            Antes de bajar por una jugada se consulta el evaluador de finales (`self.endgame`):
+            si el resultado de la jugada queda determinado por las cartas restantes y el limite, el nodo
+            recibe directamente su valor y sus victorias/derrotas (las mismas que sumarían sus hojas), y no se
+            generan sus hijos. Estos nodos guardan su estado (`Node.state`), de esta forma sus hijos se
+            generan recién si la partida llega a ellos (ver `self._expand()`).\n
+            Las jugadas de cartas que superan el limite son equivalentes (derrota inmediata), por lo que se
+            representan con un único nodo, el de la primera de esas cartas en la mano, que suma una victoria/derrota
+            por cada carta representada (ver `game.solver.collapse_moves`).\n
 
             Args:
                 root (Node): Durante el calleo, será la raiz inicial; durante las llamadas recursivas
@@ -172,14 +783,14 @@ class CPUBrain:
             root.how_wins = 'n/a'  # No hay ganador
             root.heuristic_value = 0
             return
-        # Analizo los siguientes movimientos actuales
-        for i, actual_move in enumerate(current_moves):
+        # Analizo los siguientes movimientos actuales (las cartas que superan el limite se representan con una sola jugada)
+        positions, q_dead = collapse_moves(current_moves, limit)
+        for i in positions:
             # Calculo las variables para el proximo turno
-            next_current_moves = copy.deepcopy(current_moves)
-            del next_current_moves[i]  # Saco al movimiento actual de la lista de movimientos, ya que la proxima vez que le toque al dueño de esta lista, no podrá volver a elegir el movimiento actual
+            actual_move = current_moves.pop(i)  # Saco al movimiento actual de la lista de movimientos, ya que la proxima vez que le toque al dueño de esta lista, no podrá volver a elegir el movimiento actual
             new_limit = limit - actual_move  # Calculo el nuevo limite (le resto la carta que se acaba de tirar (actual_move))
             actual_depth = depth + 1  # Bajamos 1 nivel en el árbol
-            new_to_move = 'p1' if how_moves is 'p2' else 'p2'  # Calculo a quien le toca en el proximo turno (== proxima llamada recursiva)
+            new_to_move = 'p1' if how_moves == 'p2' else 'p2'  # Calculo a quien le toca en el proximo turno (== proxima llamada recursiva)
             
             # Calculo la proxima raiz
             current_node = Node(actual_move, new_limit, actual_depth, how_moves)  # Nodo del movimiento actual
@@ -187,13 +798,16 @@ class CPUBrain:
             self.__all_nodes.append(current_node)
 
             if new_limit < 0:  # Significa que el jugador actual se pasó del limite, por lo tanto pierde
-                player_how_wins = 'p1' if how_moves is 'p2' else 'p2'
+                player_how_wins = 'p1' if how_moves == 'p2' else 'p2'
                 current_node.how_wins = player_how_wins # Seteo al ganador en la jugada actual, como el jugador contrario al que esta moviviendo ahora
                 current_node.heuristic_value = self.VALUES[player_how_wins]
-                current_node.wins += 1 if player_how_wins == self.who_am_i else 0
-                current_node.loses += 1 if player_how_wins != self.who_am_i else 0
-            else:  # Todavía no se superó el limite, por lo tanto es el turno del proximo jugador
-                self.simulate_moves(current_node, next_moves, next_current_moves, actual_depth, new_to_move, new_limit)  # Calculo la proxima jugada, cambiando
+                current_node.wins += q_dead if player_how_wins == self.who_am_i else 0  # Una victoria/derrota por cada carta representada
+                current_node.loses += q_dead if player_how_wins != self.who_am_i else 0
+            elif not next_moves or not self._resolve_endgame(current_node, next_moves, current_moves, new_to_move):
+                # Todavía no se superó el limite (y el resultado no quedó determinado), por lo tanto es el turno del proximo jugador
+                self.simulate_moves(current_node, next_moves, current_moves, actual_depth, new_to_move, new_limit)  # Calculo la proxima jugada, cambiando
+
+            current_moves.insert(i, actual_move)  # Vuelvo a dejar la mano como estaba, para la proxima rama
 
         # Hora de la lógica para el MiniMax...
         if how_moves == self.who_am_i:  # Jugador a maximizar sus posibilidades de ganar
@@ -210,41 +824,108 @@ class CPUBrain:
                 root.loses += child.loses
         root.heuristic_value = heuristic_evaluation
 
+    def _resolve_endgame(self, node: Node, current_moves: list, next_moves: list, how_moves: str) -> bool:
+        """
+            Intenta resolver un nodo como final de partida (ver `game.endgame.EndgameTable`). Si lo consigue,
+            carga su valor heurístico y sus victorias/derrotas relativas a este jugador, y le asigna su estado
+            para poder generar sus hijos mas adelante.
+
+            Args:
+                node (Node): Nodo a resolver
+                current_moves (list): mano del jugador que mueve en el nodo
+                next_moves (list): mano del proximo jugador
+                how_moves (str): Id del jugador que mueve en el nodo
+
+            Returns:
+                bool: Verdadero si el nodo pudo resolverse
+        """
+        limit = node.mount_count
+        if (len(current_moves) + len(next_moves) > self.endgame.max_cards and min(current_moves) <= limit
+                and sum(current_moves) + sum(next_moves) > limit):
+            return False  # Ninguna regla puede aplicar, evito armar los bitmasks
+
+        current_mask, next_mask = hand_mask(current_moves), hand_mask(next_moves)
+        endgame = self.endgame.probe(current_mask, next_mask, limit)
+        if endgame is None:
+            return False
+
+        value, mover_wins, rival_wins = endgame
+        if how_moves == self.who_am_i:
+            node.heuristic_value, node.wins, node.loses = value, mover_wins, rival_wins
+        else:
+            node.heuristic_value, node.wins, node.loses = -value, rival_wins, mover_wins
+        side = self.players_order.index(how_moves)
+        node.state = (current_mask, next_mask, node.mount_count, side) if side == 0 else (next_mask, current_mask, node.mount_count, side)
+        return True
+
     def _get_brain_as_text(self, root: Node, q_tabs: int = 0, data: str = '') -> str:
         """
             Esta función devuelve un string que contendrá datos básicos sobre cada nodo.\n
             Para esto se realiza un recorrido que guardará primero a la raiz actual y luego
-            irá añadiendo los resultados de los nodos hijos.
+            irá añadiendo los resultados de los nodos hijos (ver `self._iter_brain_lines()`).
             El estado que devuelve esta función es utilizado para generar la vista en tiempo
             real de las posibles decisiones del jugador CPU.
             La distinción de los diferentes niveles se emulará con valores \\t (tabs).
 
             Args:
-                root (Node): Durante el calleo es la raiz desde la que se quiere comenzar a
-                    dumpear el estado; durante las llamadas recursivas representa la raiz actual
-                q_tabs (int): Cantidad de tabs por recursión
-                data (str): Al momento del calleo, su valor por defecto es nulo; durante las llamadas
-                    recursivas irá alojando los valores que devuelven sus descendientes
+                root (Node): Raiz desde la que se quiere comenzar a dumpear el estado
+                q_tabs (int): Cantidad de tabs de la raiz
+                data (str): Texto al que se le agregará el dump
 
             Returns:
                 str: Dump basado en una raiz en concreto                
         """
-        tabbing = '\t' * q_tabs
-        if not root.childs:
-            return f'\n{tabbing} Node: <{root.data}> ; h_value: <{root.heuristic_value}> ; how_plays: <{root.how_moves}> ; how_wins: <{root.how_wins}> ; win-lose: {root.wins} - {root.loses} ; win_rate: {root.win_rate}%'
-        else:
-            aux = f'\n{tabbing} Node: <{root.data}> ; h_value: <{root.heuristic_value}> ; how_plays: <{root.how_moves}> ; how_wins: <{root.how_wins}> ; win-lose: {root.wins} - {root.loses} ; win_rate: {root.win_rate}%'
-            for child in root.childs:
-                aux += self._get_brain_as_text(child, q_tabs+1, data)
+        return data + ''.join(self._iter_brain_lines(root, q_tabs))
+
+    def _iter_brain_lines(self, root: Node, q_tabs: int = 0, max_depth: int = None, max_nodes: int = None):
+        """
+            Genera, una por una, las lineas del dump de un subárbol (en el mismo orden y formato
+            que `self._get_brain_as_text()`), sin armar el texto completo en memoria.\n
+            El recorrido es iterativo (primero la raiz, y luego cada hijo con todo su subárbol)
+            y puede acotarse en profundidad y en cantidad de nodos.
 
-            return data + aux
+            Args:
+                root (Node): Raiz desde la que se quiere comenzar a dumpear el estado
+                q_tabs (int): Cantidad de tabs de la raiz
+                max_depth (int): Profundidad máxima a dumpear, relativa a la raiz (None para no acotarla)
+                max_nodes (int): Cantidad máxima de nodos a dumpear (None para no acotarla)
+
+            Yields:
+                str: Linea del dump de un nodo
+        """
+        q_nodes = 0
+        stack = [(root, q_tabs)]
+        while stack and (max_nodes is None or q_nodes < max_nodes):
+            node, node_tabs = stack.pop()
+            tabbing = '\t' * node_tabs
+            yield f'\n{tabbing} Node: <{node.data}> ; h_value: <{node.heuristic_value}> ; how_plays: <{node.how_moves}> ; how_wins: <{node.how_wins}> ; win-lose: {node.wins} - {node.loses} ; win_rate: {node.win_rate}%'
+            q_nodes += 1
+            if max_depth is None or node_tabs - q_tabs < max_depth:
+                stack.extend((child, node_tabs + 1) for child in reversed(node.childs))
 
     def dump_brain(self):
         """
             Esta función será la encargada de ir dumpeando el estado desde la raiz
             actual del juego, a unn archivo externo que podrá utiliar el backend
-            para visualizarnos el cerebro del jugador CPU
+            para visualizarnos el cerebro del jugador CPU.\n
+            El dump se escribe a medida que se recorre el árbol (acotado por `self.dump_max_depth`
+            y `self.dump_max_nodes`), y se omite si la raiz actual no cambió desde el último dump.\n
+            Con el formato 'binary' se escribe un snapshot binario del árbol (ver `game.snapshot.write_snapshot`).\n
+            El tiempo y el tamaño de cada dump se registran en `self.metrics`.
+
+            Returns:
+                bool: Verdadero si se escribió el dump (es decir, si la raiz actual cambió)
         """
-        with open(self.dump_dir, 'w', encoding='utf-8') as file_buffer:
-            data = self._get_brain_as_text(self.current_game_root)
-            file_buffer.write(data)
+        if self.current_game_root is self._last_dumped_root:
+            return False
+
+        start = time.perf_counter()
+        if self.dump_format == 'binary':
+            write_snapshot(self.current_game_root, self.dump_dir, self.players_order or ('p1', 'p2'), max_depth=self.dump_max_depth, max_nodes=self.dump_max_nodes)
+        else:
+            with open(self.dump_dir, 'w', encoding='utf-8') as file_buffer:
+                file_buffer.writelines(self._iter_brain_lines(self.current_game_root, max_depth=self.dump_max_depth, max_nodes=self.dump_max_nodes))
+        self._last_dumped_root = self.current_game_root
+        self.metrics.dump_times_ms.append((time.perf_counter() - start) * 1000)
+        self.metrics.dump_bytes.append(os.path.getsize(self.dump_dir))
+        return True
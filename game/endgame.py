@@ -0,0 +1,146 @@
+"""
+    Evaluación de finales de partida.
+
+    Cerca del final de una partida el resultado suele quedar determinado por aritmética sobre
+    las cartas restantes y el limite, sin necesidad de generar todas sus jugadas:
+
+    - Si todas las cartas del jugador que mueve superan el limite restante, cualquier jugada
+      pierde de inmediato (cada una de sus cartas es una hoja en la que gana el rival).
+    - Si la suma de todas las cartas restantes entra en el limite, nadie puede pasarse
+      y la partida termina sin ganador en todas sus ramas. Notar que la diferencia entre las
+      cartas restantes y el limite restante no cambia al jugar, por lo que esto se da en toda
+      la partida o en ninguna de sus posiciones.
+    - Con pocas cartas restantes, el resultado (y la cantidad de hojas ganadas por cada jugador)
+      se calcula con una programación dinámica sobre las manos restantes (ver `EndgameTable`).
+
+    Las manos se representan como bitmasks (ver `game.solver.hand_mask`), y sus sumas se calculan
+    con tablas precalculadas por byte, de a 8 cartas por consulta.
+"""
+BYTE_SUMS = tuple(sum(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+BYTE_COUNTS = tuple(bin(byte).count('1') for byte in range(256))
+
+
+def mask_sum(mask: int) -> int:
+    """
+        Args:
+            mask (int): Bitmask de una mano
+
+        Returns:
+            int: Suma de las cartas de la mano
+    """
+    total = 0
+    offset = 0
+    while mask:
+        byte = mask & 0xFF
+        total += BYTE_SUMS[byte] + offset * BYTE_COUNTS[byte]
+        mask >>= 8
+        offset += 8
+    return total
+
+
+def mask_count(mask: int) -> int:
+    """
+        Args:
+            mask (int): Bitmask de una mano
+
+        Returns:
+            int: Cantidad de cartas de la mano
+    """
+    return bin(mask).count('1')
+
+
+def evaluate_endgame(mover_mask: int, rival_mask: int, limit: int) -> tuple:
+    """
+        Resuelve un estado de forma cerrada, si el mismo queda determinado por las cartas
+        restantes y el limite.\n
+        Las victorias informadas son las mismas que se obtendrían contando las hojas del
+        subárbol completo del estado (ver `game.solver.TranspositionSolver`).
+
+        Args:
+            mover_mask (int): Bitmask de la mano del jugador que mueve
+            rival_mask (int): Bitmask de la mano del rival
+            limit (int): Limite restante (no negativo)
+
+        Returns:
+            tuple: `(valor, victorias_del_que_mueve, victorias_del_rival)`, con el valor relativo
+                al jugador que mueve; o None si el estado no puede resolverse de forma cerrada
+    """
+    if not mover_mask:
+        # Llegue a una hoja, no hay ganador
+        return (0, 0, 0)
+    if not mover_mask & ((1 << (limit + 1)) - 1):
+        # Cualquier carta sobrepasa el limite, cada jugada es una derrota inmediata
+        return (-1, 0, mask_count(mover_mask))
+    if mask_sum(mover_mask | rival_mask) <= limit:
+        # Nadie puede pasarse del limite, ninguna rama tiene ganador
+        return (0, 0, 0)
+    return None
+
+
+class EndgameTable:
+    """
+        Resuelve de forma exacta los estados con pocas cartas restantes, por medio de una
+        programación dinámica (memoizada) sobre las manos restantes.\n
+        Los estados se guardan desde la perspectiva del jugador que mueve, `(mano_del_que_mueve,
+        mano_del_rival, limite)`, por lo que un mismo final sirve para ambos jugadores. Las jugadas
+        de cartas que superan el limite no se recorren, se suman como derrotas inmediatas.
+
+        Attributes:
+            max_cards (int): Cantidad máxima de cartas restantes (entre ambas manos) de los
+                estados que se resuelven con la programación dinámica. Con 0 solo se aplican
+                las reglas cerradas de `evaluate_endgame`
+            table (dict): Estados resueltos, mapea `(mano_del_que_mueve, mano_del_rival, limite)`
+                a `(valor, victorias_del_que_mueve, victorias_del_rival)`
+    """
+    DEFAULT_MAX_CARDS = 6
+
+    def __init__(self, max_cards: int = DEFAULT_MAX_CARDS):
+        self.max_cards = max_cards
+        self.table = {}
+
+    def probe(self, mover_mask: int, rival_mask: int, limit: int) -> tuple:
+        """
+            Args:
+                mover_mask (int): Bitmask de la mano del jugador que mueve
+                rival_mask (int): Bitmask de la mano del rival
+                limit (int): Limite restante (no negativo)
+
+            Returns:
+                tuple: `(valor, victorias_del_que_mueve, victorias_del_rival)` relativo al jugador
+                    que mueve, o None si el estado no es un final que pueda resolverse
+        """
+        result = self.table.get((mover_mask, rival_mask, limit))
+        if result is not None:
+            return result
+        if mask_count(mover_mask | rival_mask) <= self.max_cards:
+            return self._solve(mover_mask, rival_mask, limit)
+        return evaluate_endgame(mover_mask, rival_mask, limit)
+
+    def _solve(self, mover_mask: int, rival_mask: int, limit: int) -> tuple:
+        key = (mover_mask, rival_mask, limit)
+        result = self.table.get(key)
+        if result is not None:
+            return result
+
+        result = evaluate_endgame(mover_mask, rival_mask, limit)
+        if result is None:
+            best = -1
+            mover_wins = 0
+            rival_wins = 0
+            remaining = mover_mask & ((1 << (limit + 1)) - 1)  # Cartas que todavía entran en el limite
+            if remaining != mover_mask:  # Cada carta que supera el limite es una derrota inmediata
+                rival_wins = mask_count(mover_mask ^ remaining)
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                card = bit.bit_length() - 1
+                # En el hijo mueve el rival, por lo que sus valores se invierten
+                value, child_mover_wins, child_rival_wins = self._solve(rival_mask, mover_mask ^ bit, limit - card)
+                mover_wins += child_rival_wins
+                rival_wins += child_mover_wins
+                if -value > best:
+                    best = -value
+            result = (best, mover_wins, rival_wins)
+
+        self.table[key] = result
+        return result
@@ -0,0 +1,84 @@
+import json
+import os
+import time
+
+
+class EventPublisher:
+    """
+        Publica los eventos de una partida (jugadas, cambios de raiz de los jugadores CPU, etc.)
+        en un archivo de eventos, con un evento JSON por linea.\n
+        El archivo funciona como bus de eventos entre el proceso del juego y el backend
+        (ver `follow_events`): los lectores solo leen las lineas nuevas, sin volver a leer
+        el archivo completo. Al comenzar una partida el archivo se trunca.
+
+        Attributes:
+            path (str): Ruta al archivo de eventos
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def reset(self):
+        """
+            Vacia el archivo de eventos (se utiliza al comenzar una nueva partida).
+        """
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+
+    def publish(self, event_type: str, **data):
+        """
+            Args:
+                event_type (str): Tipo de evento (por ejemplo 'move' o 'root')
+                data: Datos del evento
+        """
+        event = dict(data, type=event_type, time=time.time())
+        with open(self.path, 'a', encoding='utf-8') as file_buffer:
+            file_buffer.write(json.dumps(event) + '\n')
+
+
+def follow_events(path: str, poll_interval: float = 0.1, heartbeat: float = 15):
+    """
+        Sigue un archivo de eventos escrito por `EventPublisher`, devolviendo los eventos
+        a medida que se publican (análogo a `tail -f`). Solo se leen los bytes nuevos del archivo,
+        y si el archivo se trunca (nueva partida) se vuelve a leer desde el comienzo.
+
+        Args:
+            path (str): Ruta al archivo de eventos
+            poll_interval (float): Segundos entre cada chequeo de eventos nuevos
+            heartbeat (float): Segundos sin eventos luego de los cuales se devuelve None, de esta
+                forma quien consume los eventos puede chequear que su cliente siga conectado
+
+        Yields:
+            dict: Evento publicado (o None luego de `heartbeat` segundos sin eventos)
+    """
+    existed = os.path.exists(path)
+    idle = 0
+    while not os.path.exists(path):  # Mientras se espera al archivo también se envía el heartbeat
+        time.sleep(poll_interval)
+        idle += poll_interval
+        if idle >= heartbeat:
+            idle = 0
+            yield None
+
+    with open(path, 'r', encoding='utf-8') as file_buffer:
+        if existed:
+            file_buffer.seek(0, os.SEEK_END)  # Solo interesan los eventos nuevos
+        pending = ''
+        while True:
+            line = file_buffer.readline()
+            if line:
+                pending += line
+                if pending.endswith('\n'):  # Se espera a que la linea esté completa
+                    event, pending, idle = json.loads(pending), '', 0
+                    yield event
+                continue
+
+            if os.path.getsize(path) < file_buffer.tell():  # El archivo fue truncado
+                file_buffer.seek(0)
+                pending = ''
+                continue
+
+            time.sleep(poll_interval)
+            idle += poll_interval
+            if idle >= heartbeat:
+                idle = 0
+                yield None
@@ -4,3 +4,7 @@ class WrongGameConfigurationError(Exception):
 
 class WrongOrderError(Exception):
     pass
+
+
+class WrongMoveError(Exception):
+    pass
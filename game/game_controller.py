@@ -1,8 +1,10 @@
-import copy
 import random
+import time
 
 from game import exceptions
 from game.cpu_controller import CPUBrain
+from game.events import EventPublisher
+from game.metrics import write_game_metrics
 
 
 class Game:
@@ -17,8 +19,15 @@ class Game:
             cpu_players (tuple): tupla que contiene los ids de jugadores que serán CPUPlayers
             lower_threshold_limit (int): Porcentaje mínimo para la selección del limite del monto
             higher_threshold_limit (int): Porcentaje máximo para la selección del limite del monto
+            verbose (bool): Si es falso, la partida se juega sin imprimir nada por consola
+            dump_brains (bool): Si es falso, no se hace el dump del cerebro de los jugadores CPU
+            events (EventPublisher): Publicador de los eventos de la partida (jugadas y cambios de raiz
+                de los jugadores CPU), None si no se publican eventos
+            metrics_location (str): Ruta al archivo donde se agrega el resumen de métricas de cada partida
+                (ver `game.metrics`), None si no se guardan
     """
-    def __init__(self, limit: int, players_name_mapping: dict, q_cards: int, cpu_players: tuple, lower_threshold_limit: int, higher_threshold_limit: int):
+    def __init__(self, limit: int, players_name_mapping: dict, q_cards: int, cpu_players: tuple, lower_threshold_limit: int, higher_threshold_limit: int,
+                 verbose: bool = True, dump_brains: bool = True, events_location: str = None, metrics_location: str = None):
         self.maximum_mount_limit = limit
         self.players_name_mapping = players_name_mapping
         self.q_cards = q_cards
@@ -26,6 +35,10 @@ class Game:
 
         self.lower_threshold_limit = lower_threshold_limit
         self.higher_threshold_limit = higher_threshold_limit
+        self.verbose = verbose
+        self.dump_brains = dump_brains
+        self.events = EventPublisher(events_location) if events_location else None
+        self.metrics_location = metrics_location
 
     def decide_first_player(self) -> list:
         """
@@ -75,35 +88,89 @@ class Game:
 
         return deck
 
+    def _print(self, message: str = ''):
+        if self.verbose:
+            print(message)
+
+    def _publish(self, event_type: str, **data):
+        if self.events is not None:
+            self.events.publish(event_type, **data)
+
+    def _dump_cpu_brains(self, current_game_players: dict, played_cards: list):
+        if self.dump_brains:
+            for cpu_player in self.cpu_players:
+                cpu_instance = current_game_players[cpu_player]['instance']
+                if cpu_instance.dump_brain():
+                    # La profundidad de la raiz actual es la cantidad de cartas que el jugador ya siguió
+                    self._publish('root', player=cpu_player, path=played_cards[:cpu_instance.current_game_root.depth],
+                                  mount_count=cpu_instance.current_game_root.mount_count)
+
+    def reset(self):
+        """
+            Reinicia los controladores de los jugadores para una nueva partida (ver `CPUBrain.reset()`).
+            Los controladores se reutilizan en lugar de copiarse, por lo que el reinicio no depende del tamaño
+            del cerebro de la partida anterior (que queda liberado), y se conservan los datos que no dependen
+            del reparto (como el evaluador de finales de los jugadores CPU).
+        """
+        for player in self.players_name_mapping.values():
+            player['instance'].reset()
+
     def start(self):
         """
             Rutina de juego.\n
-            La misma se encargá de guardar una copia profunda (no Shallow)
-            de las instancias de los jugadores (previo a que, por ejemplo,
-            un jugador CPU calcule los movimientos de la partida).\n
+            La misma juega una partida (ver `self.play_match()`) y luego de que termine,
+            si hay al menos 1 jugador humano, se le preguntará si quiere volver a jugar
+            (esta funcionalidad no tiene que reiniciar los estados de los controladores
+            de jugadores, puesto que al comienzo de cada partida se reinician, ver `self.reset()`)\n
+        """
+        while True:
+            self.play_match()
+
+            if len(self.cpu_players) == 2:
+                return
+            res = input('Quiere volver a jugar una nueva partida? [y/n]: ')
+            if res != 'y' and res != 'Y':
+                return
+
+    def play_match(self) -> dict:
+        """
+            Juega una partida completa.\n
+            La misma se encargá de reiniciar las instancias de los jugadores (ver `self.reset()`),
+            previo a que, por ejemplo, un jugador CPU calcule los movimientos de la partida.\n
             El orden de esta rutina será:\n
             \t1. En principio se valida el limite pasado como parámetro, derivando
             en una excepción terminante si el mismo no es valido.\n
             \t2. Luego se identifican las instancias del primer y segundo jugador y
             se les asignan sus respectivas manos\n
             \t3. Posteriormente se verifica que jugador es CPU y en ese caso, se le pide
-            que simule todos los movimientos posibles (esta sección no aplica a controladores de humanos)\n
-            \t4. Se abre el bucle de juego, el mismo seguirá iterando sobre varios turnos hasta que un jugador pierda.\n
+            que arme su cerebro con el motor de búsqueda que tenga configurado (esta sección no aplica a controladores de humanos).
+            Si ambos jugadores son CPU con la misma configuración, el segundo comparte el cerebro del primero
+            (ver `CPUBrain.share_brain()`), por lo que la partida se resuelve una única vez\n
+            \t4. Se abre el bucle de juego, el mismo seguirá iterando sobre varios turnos hasta que un jugador pierda
+            (o hasta que no queden cartas por jugar, en cuyo caso no hay ganador).\n
             Cabe hacer las siguientes aclaraciones:\n
             \t- Es indistinto para el juego si hay 1 jugador humano y uno maquina, o si son 2 humanos o 2 maquinas
             las interfaces de juego de ambos controladores son análogas.\n
             \t- Al comienzo y al final de cada iteración (turno) se correrá una porción de código que se encargá
-            de hacer el dump de cada jugador CPU a su archivo correspondiente.\n
-            \t- Luego de que se corté el bucle de juego, y haya al menos 1 jugador humano se le
-            preguntará si quiere volver a jugar (esta funcionalidad no tiene que reiniciar los estados de los controladores
-            de jugadores, puesto que al comienzo de esta función se hace una copia profunda de los mismos)\n
+            de hacer el dump de cada jugador CPU a su archivo correspondiente (salvo que `self.dump_brains` sea falso).\n
+            \t- Si hay un publicador de eventos (`self.events`), se publican el comienzo y el fin de la partida, cada jugada
+            y cada cambio de la raiz actual de los jugadores CPU (ver `game.events`).\n
+            \t- Al terminar se arma el resumen de métricas de la partida (ver `self._metrics_summary()`), que se agrega
+            al archivo `self.metrics_location` si está configurado.\n
+
+            Returns:
+                dict: Resultado de la partida, con las claves `first_player` (id del primer jugador),
+                    `winner` (id del ganador, None si no hubo ganador), `turns` (turnos jugados),
+                    `cards_played` (cartas descartadas), `mount` (monto final) y `metrics` (resumen de métricas)
         """
-        current_game_players = copy.deepcopy(self.players_name_mapping)
+        start = time.perf_counter()
+        self.reset()
+        current_game_players = self.players_name_mapping
         limit_validation = self.validate_limit()
         if limit_validation[0]:
-            print(f'Limite valido! (Limite porcentual relativo al máximo monto de descarte: {limit_validation[1]}%)')
+            self._print(f'Limite valido! (Limite porcentual relativo al máximo monto de descarte: {limit_validation[1]}%)')
         else:
-            print(f'Limite no valido! (Limite porcentual relativo al máximo monto de descarte: {limit_validation[1]}%)')
+            self._print(f'Limite no valido! (Limite porcentual relativo al máximo monto de descarte: {limit_validation[1]}%)')
             raise exceptions.WrongGameConfigurationError(f'Ha provisto un limite que no se encuentra entre los limites: {self.lower_threshold_limit} < x < {self.higher_threshold_limit}')
 
         player_order = self.decide_first_player()
@@ -116,54 +183,110 @@ class Game:
 
         # Detecto cuales jugadores son cpu y en ese caso hago generen su cerebro
         if isinstance(first_player, CPUBrain):
-            first_player.simulate_moves(first_player.main_root, first_player.my_cards, second_player.my_cards, 0, first_player.who_am_i, self.maximum_mount_limit)
+            first_player.prepare_brain(first_player.my_cards, second_player.my_cards, first_player.who_am_i, self.maximum_mount_limit)
         
         if isinstance(second_player, CPUBrain):
-            second_player.simulate_moves(second_player.main_root, first_player.my_cards, second_player.my_cards, 0, first_player.who_am_i, self.maximum_mount_limit)
+            # En las partidas CPU vs. CPU el segundo jugador comparte el cerebro del primero (si es compatible)
+            shared_with = first_player if isinstance(first_player, CPUBrain) and second_player.can_share_brain(first_player) else None
+            second_player.prepare_brain(first_player.my_cards, second_player.my_cards, first_player.who_am_i, self.maximum_mount_limit,
+                                        shared_with=shared_with)
+
+        if self.events is not None:
+            self.events.reset()
+        self._publish('game_start', players=player_order, limit=self.maximum_mount_limit)
 
         global_mount_count = 0
         last_card = None
         turno = 0
+        played_cards = []
+        winner = None
         while True:  # Mientras el monto total siga sin pasar el limite, se continua el juego
-            for cpu_player in self.cpu_players:
-                current_game_players[cpu_player]['instance'].dump_brain()
-            print('\n--------------------------------------------------------------------------------')
-            print('Comenzando un nuevo turno...')
-            print(f'Actualmente nos encontramos en el turno: {turno}')
-            print(f'El monto actual es de {global_mount_count} (el limite es de {self.maximum_mount_limit})')
+            self._dump_cpu_brains(current_game_players, played_cards)
+            self._print('\n--------------------------------------------------------------------------------')
+            self._print('Comenzando un nuevo turno...')
+            self._print(f'Actualmente nos encontramos en el turno: {turno}')
+            self._print(f'El monto actual es de {global_mount_count} (el limite es de {self.maximum_mount_limit})')
 
-            print('\n')
+            self._print('\n')
 
-            print(f'Y le toca jugar a {first_player.alias}!')
+            if not first_player.my_cards:
+                self._print('No quedan cartas por jugar, la partida termina sin ganador!')
+                break
+
+            turno += 1  # Comienza un nuevo turno (`turno` es la cantidad de turnos comenzados)
+            self._print(f'Y le toca jugar a {first_player.alias}!')
             first_player_move = first_player.play_a_move(last_card)
-            print(f'El jugador {first_player.alias} ha descartado la carta: {first_player_move}')
+            self._print(f'El jugador {first_player.alias} ha descartado la carta: {first_player_move}')
             last_card = first_player_move
             global_mount_count += first_player_move
+            played_cards.append(first_player_move)
+            self._publish('move', player=first_player.who_am_i, card=first_player_move, mount=global_mount_count, played_cards=played_cards)
             if global_mount_count > self.maximum_mount_limit:
-                print(f'\nEl jugador {first_player.who_am_i} pierde! Sobrepaso el limite del juego ({global_mount_count})')
-                print(f'Felicidades {second_player.alias} has vencido!')
+                self._print(f'\nEl jugador {first_player.who_am_i} pierde! Sobrepaso el limite del juego ({global_mount_count})')
+                self._print(f'Felicidades {second_player.alias} has vencido!')
+                winner = second_player.who_am_i
                 break
 
-            print('\n')
-            print(f'\nEl monto se ha aumentado a {global_mount_count}!!')
+            self._print('\n')
+            self._print(f'\nEl monto se ha aumentado a {global_mount_count}!!')
+
+            if not second_player.my_cards:
+                self._print('No quedan cartas por jugar, la partida termina sin ganador!')
+                break
 
-            print(f'Esperando el movimiento de  {second_player.alias}!')
+            self._print(f'Esperando el movimiento de  {second_player.alias}!')
             second_player_move = second_player.play_a_move(last_card)
-            print(f'El jugador {second_player.alias} ha descartado la carta: {second_player_move}')
+            self._print(f'El jugador {second_player.alias} ha descartado la carta: {second_player_move}')
             last_card = second_player_move
             global_mount_count += second_player_move
+            played_cards.append(second_player_move)
+            self._publish('move', player=second_player.who_am_i, card=second_player_move, mount=global_mount_count, played_cards=played_cards)
             if global_mount_count > self.maximum_mount_limit:
-              print(f'\nEl jugador {second_player.who_am_i} pierde! Sobrepaso el limite del juego ({global_mount_count})')
-              print(f'Felicidades {first_player.alias} has vencido!')
+              self._print(f'\nEl jugador {second_player.who_am_i} pierde! Sobrepaso el limite del juego ({global_mount_count})')
+              self._print(f'Felicidades {first_player.alias} has vencido!')
+              winner = first_player.who_am_i
               break
 
-            for cpu_player in self.cpu_players:
-                current_game_players[cpu_player]['instance'].dump_brain()
-            turno += 1
-        
-        if len(self.cpu_players) == 2:
-            pass
-        else:
-            res = input('Quiere volver a jugar una nueva partida? [y/n]: ')
-            if res == 'y' or res == 'Y':
-                self.start()
+            self._dump_cpu_brains(current_game_players, played_cards)
+
+        self._publish('game_over', winner=winner, mount=global_mount_count, played_cards=played_cards)
+        result = {
+            'first_player': first_player.who_am_i,
+            'winner': winner,
+            'turns': turno,
+            'cards_played': len(played_cards),
+            'mount': global_mount_count,
+        }
+        result['metrics'] = self._metrics_summary(current_game_players, result, time.perf_counter() - start)
+        if self.metrics_location:
+            write_game_metrics(self.metrics_location, result['metrics'])
+        return result
+
+    def _metrics_summary(self, current_game_players: dict, result: dict, game_time: float) -> dict:
+        """
+            Arma el resumen de métricas de una partida.
+
+            Args:
+                current_game_players (dict): Jugadores de la partida
+                result (dict): Resultado de la partida
+                game_time (float): Duración de la partida en segundos
+
+            Returns:
+                dict: Resumen (serializable a JSON) con la configuración y el resultado de la partida,
+                    y las métricas de cada jugador CPU (ver `game.metrics.BrainMetrics`)
+        """
+        return {
+            'time': time.time(),
+            'deck_size': self.q_cards,
+            'limit': self.maximum_mount_limit,
+            'first_player': result['first_player'],
+            'winner': result['winner'],
+            'cards_played': result['cards_played'],
+            'game_time_s': game_time,
+            'players': {
+                cpu_player: dict(current_game_players[cpu_player]['instance'].metrics.summary(),
+                                 alias=current_game_players[cpu_player]['instance'].alias,
+                                 engine=current_game_players[cpu_player]['instance'].engine)
+                for cpu_player in self.cpu_players
+            },
+        }
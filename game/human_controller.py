@@ -21,6 +21,12 @@ class HumanController:
         self.my_cards = []
         self.alias = alias
 
+    def reset(self):
+        """
+            Reinicia el estado de la partida actual (ver `game.cpu_controller.CPUBrain.reset`).
+        """
+        self.my_cards = []
+
     def play_a_move(self, last_card: int):
         """
             Esta función es la llamada desde la rutina del juego.\n
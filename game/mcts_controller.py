@@ -0,0 +1,242 @@
+import math
+import random
+import time
+
+from game import exceptions
+from game.cpu_controller import CPUBrain
+from game.node import Node
+from game.solver import initial_state, mask_cards, play_card
+
+
+class MCTSNode(Node):
+    """
+        Nodo del árbol de búsqueda de `MCTSBrain`.\n
+        Las victorias y derrotas son las de las simulaciones que pasaron por el nodo,
+        relativas al jugador dueño del árbol (igual que en `Node`).
+
+        Attributes:
+            visits (int): Cantidad de simulaciones que pasaron por el nodo
+            untried (list): Cartas que todavía no fueron expandidas como hijos del nodo
+                (None si todavía no se calcularon)
+    """
+    __slots__ = ('visits', 'untried')
+
+    def __init__(self, data: int, mount_count: int, depth, how_moves: str = None):
+        super().__init__(data, mount_count, depth, how_moves)
+        self.visits = 0
+        self.untried = None
+
+
+class MCTSBrain(CPUBrain):
+    """
+        Jugador CPU que elige sus jugadas por medio de Monte Carlo Tree Search (UCT),
+        pensado para mazos demasiado grandes para resolverse de forma exacta.\n
+        En cada jugada se corren simulaciones desde la raiz actual del juego hasta agotar el
+        presupuesto (cantidad de iteraciones y/o tiempo por jugada): se baja por el árbol eligiendo
+        hijos con UCB1, se expande una carta nueva y se termina la partida con jugadas al azar
+        (evitando pasarse del limite mientras se pueda). Se juega la carta del hijo mas visitado.\n
+        El árbol se reutiliza entre turnos: la raiz se mueve a la carta jugada por el rival
+        (ver `self._follow_move()`) y se descartan las ramas que ya no pueden alcanzarse,
+        por lo que la latencia y la memoria de cada jugada quedan acotadas por el presupuesto.\n
+        Su interfaz de juego es la misma que la de `CPUBrain` (incluyendo el dump del cerebro).
+
+        Attributes:
+            iterations (int): Cantidad máxima de simulaciones por jugada (None para no acotarla)
+            move_time_ms (int): Tiempo máximo por jugada en milisegundos (None para no acotarlo)
+            exploration (float): Constante de exploración de UCB1
+            random (random.Random): Generador de números aleatorios de las simulaciones
+    """
+    DEFAULT_ITERATIONS = 1000
+    DEFAULT_EXPLORATION = math.sqrt(2)
+
+    def __init__(self, who_am_i: str, main_root: Node, alias: str, dump_dir: str, iterations: int = None, move_time_ms: int = None,
+                 exploration: float = DEFAULT_EXPLORATION, seed: int = None, verbose: bool = True,
+                 dump_max_depth: int = None, dump_max_nodes: int = None, dump_format: str = 'text', profile: bool = False):
+        if iterations is None and move_time_ms is None:
+            iterations = self.DEFAULT_ITERATIONS
+        if (iterations is not None and iterations < 1) or (move_time_ms is not None and move_time_ms <= 0):
+            raise exceptions.WrongGameConfigurationError('El presupuesto por jugada de MCTS debe ser positivo')
+
+        super().__init__(who_am_i, main_root, alias, dump_dir, verbose=verbose, dump_max_depth=dump_max_depth,
+                         dump_max_nodes=dump_max_nodes, dump_format=dump_format, profile=profile)
+        self.search = 'mcts'
+        self.iterations = iterations
+        self.move_time_ms = move_time_ms
+        self.exploration = exploration
+        self.random = random.Random(seed)
+
+    @property
+    def nodes_count(self) -> int:
+        return self._subtree_size(self.main_root)
+
+    @staticmethod
+    def _subtree_size(root: MCTSNode) -> int:
+        q_nodes = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            q_nodes += 1
+            stack.extend(node.childs)
+        return q_nodes
+
+    def _build_brain(self, first_cards: list, second_cards: list, first_player: str, limit: int):
+        """
+            Prepara el árbol de búsqueda para la partida actual. No se simula nada en
+            este momento, las simulaciones se corren en cada jugada.
+
+            Args:
+                first_cards (list): mano del primer jugador
+                second_cards (list): mano del segundo jugador
+                first_player (str): Id del primer jugador
+                limit (int): Limite máximo de la partida
+        """
+        second_player = 'p1' if first_player == 'p2' else 'p2'
+        self.players_order = (first_player, second_player)
+        self.hands = (list(first_cards), list(second_cards))
+        self.main_root = MCTSNode(None, limit, 0)
+        self.main_root.state = initial_state(first_cards, second_cards, limit)
+        self.current_game_root = self.main_root
+
+    def search_best_child(self) -> MCTSNode:
+        """
+            Corre simulaciones desde la raiz actual del juego hasta agotar el presupuesto
+            por jugada, y devuelve el hijo mas visitado.
+
+            Returns:
+                MCTSNode: Mejor hijo
+        """
+        root = self.current_game_root
+        deadline = None if self.move_time_ms is None else time.perf_counter() + self.move_time_ms / 1000
+        q_iterations = 0
+        while not root.childs or ((self.iterations is None or q_iterations < self.iterations) and
+                                  (deadline is None or time.perf_counter() < deadline)):
+            self._iterate(root)
+            q_iterations += 1
+
+        return max(root.childs, key=lambda child: child.visits)
+
+    def _iterate(self, root: MCTSNode):
+        """
+            Corre una simulación: selección (UCB1), expansión de una carta, partida al azar
+            y propagación del resultado por el camino recorrido.
+        """
+        node = root
+        path = [root]
+        result = self._terminal_result(node)
+        while result is None:
+            if node.untried is None:
+                node.untried = self._candidate_cards(node)
+            if node.untried:  # Expansión
+                card = node.untried.pop(self.random.randrange(len(node.untried)))
+                node = self._create_child(node, card)
+                path.append(node)
+                result = self._terminal_result(node)
+                if result is None:
+                    result = self._rollout(node.state)
+                break
+            node = self._select_child(node)
+            path.append(node)
+            result = self._terminal_result(node)
+
+        for node in path:
+            node.visits += 1
+            if result > 0:
+                node.wins += 1
+            elif result < 0:
+                node.loses += 1
+            node.heuristic_value = (node.wins - node.loses) / node.visits
+
+    def _terminal_result(self, node: MCTSNode) -> int:
+        """
+            Returns:
+                int: Resultado del nodo si es terminal, relativo a este jugador (1 victoria,
+                    -1 derrota, 0 sin ganador), o None si la partida sigue
+        """
+        first_mask, second_mask, limit, side = node.state
+        if limit < 0:  # El jugador que movió se pasó del limite
+            return 1 if self.players_order[side] == self.who_am_i else -1
+        if not (first_mask, second_mask)[side]:
+            return 0
+        return None
+
+    def _candidate_cards(self, node: MCTSNode) -> list:
+        """
+            Cartas a expandir de un nodo. Si el jugador que mueve tiene cartas que entran
+            en el limite se descartan las que lo superan, ya que pierden de inmediato.
+        """
+        side = node.state[3]
+        cards = mask_cards(self.hands[side], node.state[side])
+        playable = [card for card in cards if card <= node.state[2]]
+        return playable or cards
+
+    def _select_child(self, node: MCTSNode) -> MCTSNode:
+        sign = 1 if self.players_order[node.state[3]] == self.who_am_i else -1  # El rival minimiza nuestro resultado
+        log_visits = math.log(node.visits)
+        best_score = float('-inf')
+        best_child = None
+        for child in node.childs:
+            if child.visits == 0:
+                return child
+            score = sign * (child.wins - child.loses) / child.visits + self.exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _rollout(self, state: tuple) -> int:
+        """
+            Termina la partida desde un estado con jugadas al azar, evitando pasarse del
+            limite mientras el jugador que mueve tenga alguna carta que entre.
+
+            Returns:
+                int: Resultado relativo a este jugador (1 victoria, -1 derrota, 0 sin ganador)
+        """
+        masks = [state[0], state[1]]
+        limit, side = state[2], state[3]
+        while masks[side]:
+            playable = masks[side] & ((1 << (limit + 1)) - 1)
+            if not playable:  # Cualquier carta supera el limite, pierde el jugador que mueve
+                return 1 if self.players_order[1 - side] == self.who_am_i else -1
+
+            cards = []
+            while playable:
+                lowest = playable & -playable
+                cards.append(lowest.bit_length() - 1)
+                playable ^= lowest
+            card = self.random.choice(cards)
+            masks[side] ^= 1 << card
+            limit -= card
+            side = 1 - side
+        return 0
+
+    def _create_child(self, node: MCTSNode, card: int) -> MCTSNode:
+        child_state = play_card(node.state, card)
+        child = MCTSNode(card, child_state[2], node.depth + 1, self.players_order[node.state[3]])
+        child.state = child_state
+        if child.mount_count < 0:  # El jugador que movió se pasó del limite
+            child.how_wins = self.players_order[child_state[3]]
+        node.add_child(child)
+        return child
+
+    def _follow_move(self, card: int) -> MCTSNode:
+        """
+            Devuelve el hijo de la raiz actual que corresponde a la carta jugada por el rival
+            (creandolo si todavía no fue expandido), conservando su subárbol de simulaciones.
+        """
+        root = self.current_game_root
+        for child in root.childs:
+            if child.data == card:
+                return child
+
+        side = root.state[3]
+        if not root.state[side] & (1 << card):
+            return root
+        if root.untried is not None and card in root.untried:
+            root.untried.remove(card)
+        return self._create_child(root, card)
+
+    def _advance_root(self, node: MCTSNode):
+        if node is not self.current_game_root:
+            self._discarded_nodes += sum(self._subtree_size(child) for child in self.current_game_root.childs if child is not node)
+            self.current_game_root.childs = [node]  # Los hermanos ya no pueden alcanzarse
+        self.current_game_root = node
@@ -0,0 +1,187 @@
+"""
+    Instrumentación de los jugadores CPU y de las partidas.
+
+    Cada jugador CPU registra sus métricas en un `BrainMetrics` (tiempo de armado del cerebro,
+    nodos generados, pico de nodos cargados, latencia de cada jugada y tiempo/tamaño de cada dump,
+    y opcionalmente un perfil de cProfile). Al terminar una partida, `Game.play_match()` arma un
+    resumen JSON con las métricas de sus jugadores CPU y, si se configuró `metrics_location`, lo agrega
+    al archivo de métricas (un resumen JSON por linea), que es el que expone la ruta `/metrics` del backend.
+"""
+import cProfile
+import contextlib
+import json
+import os
+import pstats
+
+
+def describe(values: list) -> dict:
+    """
+        Args:
+            values (list): Valores medidos
+
+        Returns:
+            dict: Cantidad, promedio, máximo y total de los valores
+    """
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else None,
+        'max': max(values, default=None),
+        'total': sum(values),
+    }
+
+
+class BrainMetrics:
+    """
+        Métricas de un jugador CPU durante una partida.
+
+        Attributes:
+            build_time_s (float): Tiempo de armado del cerebro (`CPUBrain.prepare_brain()`), en segundos
+            nodes_generated (int): Cantidad de nodos creados durante la partida (incluyendo los ya descartados)
+            peak_nodes (int): Máximo de nodos cargados en el cerebro a la vez
+            solver_states (int): Cantidad de estados del solver al terminar la última jugada (None si
+                el motor no utiliza un solver)
+            move_latencies_ms (list): Latencia de cada jugada (`CPUBrain.play_a_move()`), en milisegundos
+            dump_times_ms (list): Tiempo de cada dump del cerebro, en milisegundos
+            dump_bytes (list): Tamaño de cada dump del cerebro, en bytes
+            profile (bool): Si es verdadero, el armado del cerebro y las jugadas se corren bajo cProfile
+    """
+    PROFILE_ROWS = 15
+
+    def __init__(self, profile: bool = False):
+        self.build_time_s = None
+        self.nodes_generated = 0
+        self.peak_nodes = 0
+        self.solver_states = None
+        self.move_latencies_ms = []
+        self.dump_times_ms = []
+        self.dump_bytes = []
+        self.profile = profile
+        self._profiler = None  # Se crea recién al perfilar, de esta forma las instancias pueden copiarse en profundidad
+
+    @contextlib.contextmanager
+    def profiling(self):
+        """
+            Corre el bloque bajo cProfile si el perfilado está habilitado (`self.profile`),
+            acumulando las mediciones de todos los bloques perfilados de la partida.
+        """
+        if not self.profile:
+            yield
+            return
+
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        try:
+            yield
+        finally:
+            self._profiler.disable()
+
+    def observe_nodes(self, q_nodes: int, q_generated: int, q_states: int = None):
+        """
+            Registra el tamaño actual del cerebro.
+
+            Args:
+                q_nodes (int): Cantidad de nodos cargados actualmente
+                q_generated (int): Cantidad de nodos creados hasta el momento
+                q_states (int): Cantidad de estados del solver (None si no hay solver)
+        """
+        self.peak_nodes = max(self.peak_nodes, q_nodes)
+        self.nodes_generated = max(self.nodes_generated, q_generated)
+        self.solver_states = q_states
+
+    def profile_rows(self) -> list:
+        """
+            Returns:
+                list: Funciones con mayor tiempo acumulado del perfil (vacía si no se perfiló)
+        """
+        if self._profiler is None:
+            return []
+
+        stats = pstats.Stats(self._profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:self.PROFILE_ROWS]
+        return [
+            {
+                'function': f'{os.path.basename(filename)}:{line}({name})',
+                'calls': calls,
+                'tottime_s': round(tottime, 6),
+                'cumtime_s': round(cumtime, 6),
+            } for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+        ]
+
+    def summary(self) -> dict:
+        """
+            Returns:
+                dict: Resumen (serializable a JSON) de las métricas
+        """
+        summary = {
+            'build_time_s': self.build_time_s,
+            'nodes_generated': self.nodes_generated,
+            'peak_nodes': self.peak_nodes,
+            'solver_states': self.solver_states,
+            'move_latency_ms': describe(self.move_latencies_ms),
+            'dump_time_ms': describe(self.dump_times_ms),
+            'dump_bytes': describe(self.dump_bytes),
+        }
+        if self.profile:
+            summary['profile'] = self.profile_rows()
+        return summary
+
+
+def write_game_metrics(path: str, summary: dict):
+    """
+        Agrega el resumen de una partida al archivo de métricas.
+
+        Args:
+            path (str): Ruta al archivo de métricas
+            summary (dict): Resumen de la partida (ver `Game.play_match()`)
+    """
+    with open(path, 'a', encoding='utf-8') as file_buffer:
+        file_buffer.write(json.dumps(summary) + '\n')
+
+
+def read_game_metrics(path: str) -> list:
+    """
+        Args:
+            path (str): Ruta al archivo de métricas
+
+        Returns:
+            list: Resúmenes de las partidas, en orden (vacía si el archivo no existe)
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file_buffer:
+        return [json.loads(line) for line in file_buffer if line.strip()]
+
+
+def aggregate_metrics(summaries: list) -> list:
+    """
+        Agrupa las métricas de los jugadores CPU de varias partidas por configuración
+        (motor, cantidad de cartas y limite), para encontrar las configuraciones lentas.
+
+        Args:
+            summaries (list): Resúmenes de las partidas
+
+        Returns:
+            list: Métricas agregadas de cada configuración, de la mas lenta a la mas rápida
+                (según la latencia máxima de sus jugadas)
+    """
+    groups = {}
+    for summary in summaries:
+        for player in summary['players'].values():
+            key = (player['engine'], summary['deck_size'], summary['limit'])
+            groups.setdefault(key, []).append(player)
+
+    configurations = []
+    for (engine, deck_size, limit), players in groups.items():
+        latencies = [player['move_latency_ms']['max'] for player in players if player['move_latency_ms']['max'] is not None]
+        configurations.append({
+            'engine': engine,
+            'deck_size': deck_size,
+            'limit': limit,
+            'games': len(players),
+            'build_time_s': describe([player['build_time_s'] for player in players if player['build_time_s'] is not None]),
+            'max_move_latency_ms': describe(latencies),
+            'peak_nodes': max(player['peak_nodes'] for player in players),
+            'dump_time_ms': describe([player['dump_time_ms']['mean'] for player in players if player['dump_time_ms']['mean'] is not None]),
+        })
+    return sorted(configurations, key=lambda configuration: configuration['max_move_latency_ms']['max'] or 0, reverse=True)
@@ -22,7 +22,12 @@ class Node:
             childs (list): Lista de nodos, estos son los hijos mas inmediatos
             heuristic_value (int): Resultado de una evaluación heuristica para el
                 nodo/movimiento actual
+            state (tuple): Estado del juego que representa el nodo (ver
+                `game.solver.TranspositionSolver`), solo es asignado por los motores
+                de búsqueda que crean los nodos a demanda
     """
+    __slots__ = ('data', 'mount_count', 'how_moves', 'depth', 'wins', 'loses', 'childs', '_how_wins', 'heuristic_value', 'state')
+
     def __init__(self, data: int, mount_count: int, depth, how_moves: str = None):
         """
             Este constructor recibirá como parámetros los valores que describen
@@ -37,6 +42,7 @@ class Node:
         self.childs = []
         self._how_wins = 'n/a'
         self.heuristic_value = None
+        self.state = None
     
     def add_child(self, node):
         self.childs.append(node)
@@ -69,3 +75,74 @@ class Node:
         
     def __repr__(self):
         return str(f'<Node with data: {self.data}>')
+
+
+class MirrorNode:
+    """
+        Vista de un `Node` desde la perspectiva del rival de su dueño.\n
+        Permite que dos jugadores CPU compartan un mismo árbol: los atributos del nodo que no
+        dependen del jugador (carta, monto, profundidad, quien mueve y quien gana) se leen tal cual,
+        y los que si dependen (valor heurístico, victorias y derrotas) se invierten al leerlos.
+        Tiene la misma interfaz de lectura que `Node`, y sus hijos también son vistas (se crean al consultarlos).
+
+        Attributes:
+            node (Node): Nodo del árbol compartido
+    """
+    __slots__ = ('node',)
+
+    def __init__(self, node: Node):
+        self.node = node
+
+    @property
+    def data(self) -> int:
+        return self.node.data
+
+    @property
+    def mount_count(self) -> int:
+        return self.node.mount_count
+
+    @property
+    def depth(self) -> int:
+        return self.node.depth
+
+    @property
+    def how_moves(self) -> str:
+        return self.node.how_moves
+
+    @property
+    def how_wins(self) -> str:
+        return self.node.how_wins
+
+    @property
+    def state(self) -> tuple:
+        return self.node.state
+
+    @property
+    def heuristic_value(self) -> int:
+        value = self.node.heuristic_value
+        return value if value is None else -value
+
+    @property
+    def wins(self) -> int:
+        return self.node.loses
+
+    @property
+    def loses(self) -> int:
+        return self.node.wins
+
+    @property
+    def childs(self) -> list:
+        return [MirrorNode(child) for child in self.node.childs]
+
+    @property
+    def win_rate(self) -> int:
+        """
+            Análogo a `Node.win_rate`.
+        """
+        try:
+            return ((self.wins) * (100)) / (self.wins + self.loses)
+        except ZeroDivisionError:
+            return 'n/a'
+
+    def __repr__(self):
+        return str(f'<MirrorNode with data: {self.data}>')
@@ -0,0 +1,346 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from game.solver import collapse_moves
+
+try:
+    import numpy as np  # Opcional, solo se utiliza para anexar los subárboles del armado en paralelo
+except ImportError:
+    np = None
+
+NO_WINNER = 2
+NO_MOVER = 255
+TASKS_PER_WORKER = 8  # Subárboles por proceso del armado en paralelo, para repartir el trabajo de forma pareja
+
+
+class NodeStore:
+    """
+        Esta clase almacena el árbol completo de jugadas de una partida de forma compacta,
+        como un conjunto de columnas (`array.array`) en lugar de un objeto `Node` por jugada.\n
+        Cada nodo es un índice dentro de las columnas, y los hijos de un nodo se guardan
+        de forma contigua: alcanza con el índice del primer hijo y la cantidad de hijos para
+        recorrer el árbol, sin necesidad de seguir punteros entre objetos.\n
+        Los valores almacenados son neutrales respecto del jugador CPU que los consulta
+        (el valor heurístico se guarda desde la perspectiva del primer jugador, y las victorias
+        de cada lado por separado), cada jugador los lee desde su perspectiva por medio de `NodeView`.\n
+        El nodo con índice 0 es siempre la raiz de la partida.
+
+        Attributes:
+            players_order (tuple): Ids del primer y segundo jugador de la partida
+            card (array): Carta descartada en cada nodo (0 para la raiz)
+            mount_count (array): Limite restante luego de la jugada de cada nodo
+            depth (array): Profundidad de cada nodo
+            mover (array): Lado (0 primer jugador, 1 segundo jugador) que hizo la jugada de cada nodo
+            winner (array): Lado que gana en cada nodo (`NO_WINNER` si no hay ganador)
+            value (array): Valor heurístico de cada nodo, desde la perspectiva del primer jugador
+            first_wins (array): Victorias del primer jugador por debajo de cada nodo
+            second_wins (array): Victorias del segundo jugador por debajo de cada nodo
+            first_child (array): Índice del primer hijo de cada nodo
+            child_count (array): Cantidad de hijos de cada nodo
+    """
+    def __init__(self, players_order: tuple):
+        self.players_order = players_order
+        self.card = array('B')
+        self.mount_count = array('i')
+        self.depth = array('B')
+        self.mover = array('B')
+        self.winner = array('B')
+        self.value = array('b')
+        self.first_wins = array('Q')
+        self.second_wins = array('Q')
+        self.first_child = array('I')
+        self.child_count = array('B')
+
+    def __len__(self):
+        return len(self.card)
+
+    def append(self, card: int, mount_count: int, depth: int, mover: int) -> int:
+        """
+            Agrega un nodo (sin hijos ni valores calculados) al final del almacenamiento.
+
+            Returns:
+                int: Índice del nodo agregado
+        """
+        self.card.append(card)
+        self.mount_count.append(mount_count)
+        self.depth.append(depth)
+        self.mover.append(mover)
+        self.winner.append(NO_WINNER)
+        self.value.append(0)
+        self.first_wins.append(0)
+        self.second_wins.append(0)
+        self.first_child.append(0)
+        self.child_count.append(0)
+
+        return len(self.card) - 1
+
+    def build(self, first_cards: list, second_cards: list, limit: int, depth: int = 0):
+        """
+            Genera el árbol completo de jugadas de una partida, análogo a
+            `CPUBrain.simulate_moves`, guardando los nodos en las columnas de esta instancia.
+
+            Args:
+                first_cards (list): mano del primer jugador
+                second_cards (list): mano del segundo jugador
+                limit (int): Limite máximo de la partida
+                depth (int): Profundidad de la raiz (la cantidad de cartas ya jugadas, si se arma desde una posición avanzada)
+        """
+        root = self.append(0, limit, depth, NO_MOVER)
+        self.simulate_moves(root, list(first_cards), list(second_cards), depth, 0, limit)
+
+    def build_parallel(self, first_cards: list, second_cards: list, limit: int, workers: int, depth: int = 0):
+        """
+            Análogo a `self.build()`, pero repartiendo la generación del árbol entre varios procesos.\n
+            Los primeros niveles del árbol se generan en este proceso, agregando niveles hasta que haya
+            al menos `TASKS_PER_WORKER` subárboles por proceso (los subárboles tienen tamaños muy
+            distintos, con muchas tareas los procesos terminan de forma pareja). Cada uno de
+            los subárboles que cuelgan de ellos es independiente del resto, por lo que se generan en
+            paralelo (ver `build_subtree`) y luego se anexan a esta instancia (ver `self.attach()`). Finalmente se recalculan
+            los valores de los primeros niveles, obteniendo exactamente los mismos valores que con `self.build()`.
+
+            Args:
+                first_cards (list): mano del primer jugador
+                second_cards (list): mano del segundo jugador
+                limit (int): Limite máximo de la partida
+                workers (int): Cantidad de procesos a utilizar
+                depth (int): Profundidad de la raiz (ver `self.build()`)
+        """
+        root = self.append(0, limit, depth, NO_MOVER)
+        expanded = []
+        frontier = [(root, list(first_cards), list(second_cards), depth, 0, limit)]
+        while frontier and len(frontier) < TASKS_PER_WORKER * workers:
+            next_frontier = []
+            for node, current_moves, next_moves, node_depth, side, node_limit in frontier:
+                if not current_moves:
+                    continue  # Llegue a una hoja, no hay ganador
+
+                positions, q_dead = collapse_moves(current_moves, node_limit)
+                first_child = len(self.card)
+                for i in positions:
+                    self.append(current_moves[i], node_limit - current_moves[i], node_depth + 1, side)
+                self.first_child[node] = first_child
+                self.child_count[node] = len(positions)
+                expanded.append(node)
+
+                for child, i in enumerate(positions, first_child):
+                    actual_move = current_moves[i]
+                    new_limit = node_limit - actual_move
+                    if new_limit < 0:
+                        self.set_overflow(child, side, q_dead)
+                    else:
+                        next_frontier.append((child, next_moves, current_moves[:i] + current_moves[i + 1:], node_depth + 1, 1 - side, new_limit))
+            frontier = next_frontier
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(build_subtree, *task[1:]) for task in frontier]
+            for task, future in zip(frontier, futures):
+                self.attach(task[0], future.result())
+
+        for node in reversed(expanded):
+            self.backup(node)
+
+    def attach(self, index: int, subtree: 'NodeStore'):
+        """
+            Anexa a esta instancia un subárbol generado por separado, cuya raiz (índice 0)
+            corresponde al nodo `index` de esta instancia.\n
+            Las columnas se copian en bloque, y los índices de los primeros hijos se desplazan
+            con una única suma sobre todo el subárbol (con NumPy, si está instalado).
+
+            Args:
+                index (int): Índice del nodo que corresponde a la raiz del subárbol
+                subtree (NodeStore): Subárbol a anexar
+        """
+        offset = len(self.card) - 1  # El nodo i (i > 0) del subárbol pasa a ser el nodo i + offset
+        for column in ('card', 'mount_count', 'depth', 'mover', 'winner', 'value', 'first_wins', 'second_wins', 'child_count'):
+            values = getattr(subtree, column)
+            getattr(self, column).frombytes(memoryview(values).cast('B')[values.itemsize:])  # Sin la raiz, sin copias intermedias
+        if np is not None:
+            first_childs = np.frombuffer(subtree.first_child, dtype=np.uint32)[1:]
+            self.first_child.frombytes(np.where(first_childs != 0, first_childs + np.uint32(offset), 0).astype(np.uint32).tobytes())  # Las hojas quedan en 0
+        else:
+            self.first_child.extend(first_child + offset if first_child else 0 for first_child in subtree.first_child[1:])
+
+        if subtree.child_count[0]:
+            self.first_child[index] = subtree.first_child[0] + offset
+        self.child_count[index] = subtree.child_count[0]
+        self.winner[index] = subtree.winner[0]
+        self.value[index] = subtree.value[0]
+        self.first_wins[index] = subtree.first_wins[0]
+        self.second_wins[index] = subtree.second_wins[0]
+
+    def set_overflow(self, index: int, side: int, q_cards: int = 1):
+        """
+            Marca un nodo como una jugada en la que el jugador que movió se pasó del limite.
+
+            Args:
+                index (int): Índice del nodo
+                side (int): Lado del jugador que movió (y por lo tanto pierde)
+                q_cards (int): Cantidad de cartas que superan el limite representadas por el nodo
+                    (ver `game.solver.collapse_moves`)
+        """
+        self.winner[index] = 1 - side
+        if side == 1:
+            self.value[index] = 1
+            self.first_wins[index] = q_cards
+        else:
+            self.value[index] = -1
+            self.second_wins[index] = q_cards
+
+    def simulate_moves(self, root: int, current_moves: list, next_moves: list, depth: int, side: int, limit: int):
+        """
+            Genera recursivamente los hijos de un nodo y calcula su valor MiniMax y
+            sus victorias, de la misma forma que lo hace `CPUBrain.simulate_moves` (incluyendo
+            el agrupamiento de las cartas que superan el limite en un único hijo).\n
+            Las manos se modifican en el lugar (se quita la carta jugada y se la vuelve a
+            insertar al terminar la rama), por lo que no se generan copias por cada jugada.
+
+            Args:
+                root (int): Índice del nodo actual
+                current_moves (list): mano del jugador que mueve
+                next_moves (list): mano del proximo jugador
+                depth (int): profundidad del nodo actual
+                side (int): Lado del jugador que mueve (0 primer jugador, 1 segundo jugador)
+                limit (int): Limite restante
+        """
+        if not current_moves:
+            # Llegue a una hoja, no hay ganador
+            return
+
+        positions, q_dead = collapse_moves(current_moves, limit)
+        first_child = len(self.card)
+        for i in positions:
+            self.append(current_moves[i], limit - current_moves[i], depth + 1, side)
+        self.first_child[root] = first_child
+        self.child_count[root] = len(positions)
+
+        for child, i in enumerate(positions, first_child):
+            actual_move = current_moves.pop(i)
+            new_limit = limit - actual_move
+            if new_limit < 0:  # El jugador actual se pasó del limite, por lo tanto pierde
+                self.set_overflow(child, side, q_dead)
+            else:
+                self.simulate_moves(child, next_moves, current_moves, depth + 1, 1 - side, new_limit)
+            current_moves.insert(i, actual_move)
+
+        self.backup(root)
+
+    def backup(self, root: int):
+        """
+            Calcula el valor MiniMax y las victorias de un nodo a partir de sus hijos.
+
+            Args:
+                root (int): Índice del nodo
+        """
+        first_child = self.first_child[root]
+        children = range(first_child, first_child + self.child_count[root])
+        values = self.value[first_child:first_child + self.child_count[root]]
+        self.value[root] = max(values) if self.mover[first_child] == 0 else min(values)  # El primer jugador maximiza, el segundo minimiza
+        self.first_wins[root] = sum(self.first_wins[child] for child in children)
+        self.second_wins[root] = sum(self.second_wins[child] for child in children)
+
+    def view(self, index: int, perspective: int) -> 'NodeView':
+        """
+            Args:
+                index (int): Índice del nodo
+                perspective (int): Lado del jugador que consulta el nodo
+
+            Returns:
+                NodeView: Vista del nodo desde la perspectiva de un jugador
+        """
+        return NodeView(self, index, perspective)
+
+
+def build_subtree(current_moves: list, next_moves: list, depth: int, side: int, limit: int) -> NodeStore:
+    """
+        Genera el subárbol completo que cuelga de un estado de la partida (utilizada por
+        `NodeStore.build_parallel` en cada proceso).
+
+        Args:
+            current_moves (list): mano del jugador que mueve
+            next_moves (list): mano del proximo jugador
+            depth (int): profundidad del estado
+            side (int): Lado del jugador que mueve
+            limit (int): Limite restante
+
+        Returns:
+            NodeStore: Subárbol generado, su raiz es el nodo con índice 0
+    """
+    subtree = NodeStore(players_order=None)
+    root = subtree.append(0, limit, depth, NO_MOVER)
+    subtree.simulate_moves(root, list(current_moves), list(next_moves), depth, side, limit)
+
+    return subtree
+
+
+class NodeView:
+    """
+        Vista liviana sobre uno de los nodos de un `NodeStore`.\n
+        Expone la misma interfaz de lectura que `game.node.Node`, por lo que puede
+        utilizarse como raiz del cerebro de un jugador CPU. Los valores se traducen
+        a la perspectiva del jugador que consulta (victorias, derrotas y valor heurístico).
+
+        Attributes:
+            store (NodeStore): Almacenamiento del árbol
+            index (int): Índice del nodo dentro del almacenamiento
+            perspective (int): Lado del jugador que consulta el nodo (0 primer jugador, 1 segundo jugador)
+    """
+    __slots__ = ('store', 'index', 'perspective')
+    state = None
+
+    def __init__(self, store: NodeStore, index: int, perspective: int):
+        self.store = store
+        self.index = index
+        self.perspective = perspective
+
+    @property
+    def data(self) -> int:
+        return self.store.card[self.index] if self.index else None
+
+    @property
+    def mount_count(self) -> int:
+        return self.store.mount_count[self.index]
+
+    @property
+    def depth(self) -> int:
+        return self.store.depth[self.index]
+
+    @property
+    def how_moves(self) -> str:
+        mover = self.store.mover[self.index]
+        return None if mover == NO_MOVER else self.store.players_order[mover]
+
+    @property
+    def how_wins(self) -> str:
+        winner = self.store.winner[self.index]
+        return 'n/a' if winner == NO_WINNER else self.store.players_order[winner]
+
+    @property
+    def heuristic_value(self) -> int:
+        value = self.store.value[self.index]
+        return value if self.perspective == 0 else -value
+
+    @property
+    def wins(self) -> int:
+        return (self.store.first_wins if self.perspective == 0 else self.store.second_wins)[self.index]
+
+    @property
+    def loses(self) -> int:
+        return (self.store.second_wins if self.perspective == 0 else self.store.first_wins)[self.index]
+
+    @property
+    def childs(self) -> list:
+        first_child = self.store.first_child[self.index]
+        return [NodeView(self.store, child, self.perspective) for child in range(first_child, first_child + self.store.child_count[self.index])]
+
+    @property
+    def win_rate(self) -> int:
+        """
+            Análogo a `game.node.Node.win_rate`.
+        """
+        try:
+            return ((self.wins) * (100)) / (self.wins + self.loses)
+        except ZeroDivisionError:
+            return 'n/a'
+
+    def __repr__(self):
+        return str(f'<Node with data: {self.data}>')
@@ -0,0 +1,230 @@
+"""
+    Libro de aperturas de los jugadores CPU.
+
+    Uso:
+
+        $ (env) python -m game.opening_book --deck-size 12 --limit 40 --workers 4 --output book_12_40.bin
+
+    Para una configuración (cantidad de cartas y limite) se recorren todos los repartos posibles
+    y se guardan las mejores jugadas de los dos primeros turnos: la primera jugada del primer
+    jugador, y la respuesta del segundo jugador a cada primera jugada posible. Las jugadas se
+    eligen con el mismo criterio que los motores que resuelven la partida completa (mejor win rate,
+    ver `CPUBrain.search_best_child_based_on_win_rate`), por lo que un jugador CPU que consulta el
+    libro (ver la opción `opening_book`) juega exactamente lo mismo, sin armar su cerebro
+    hasta salir del libro.
+
+    El archivo es binario: un encabezado (`HEADER`) y un registro de tamaño fijo por reparto
+    (`record_struct`), ordenados por la mano del primer jugador para buscarlos con búsqueda binaria.
+"""
+import argparse
+import bisect
+import functools
+import itertools
+import struct
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from game.endgame import mask_count
+from game.solver import TranspositionSolver, hand_mask, initial_state, play_card
+
+MAGIC = b'CTOB'
+VERSION = 1
+HEADER = struct.Struct('<4sHBHI')  # magic, versión, cantidad de cartas, limite, cantidad de repartos
+MAX_DECK_SIZE = 31  # Las manos se guardan como bitmasks de 32 bits
+MAX_TABLE_SIZE = 2_000_000  # Estados de la tabla de transposición de cada proceso antes de vaciarla
+
+
+def record_struct(deck_size: int) -> struct.Struct:
+    """
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+
+        Returns:
+            struct.Struct: Formato del registro de un reparto: mano del primer jugador, mejores primeras
+                jugadas y mejores respuestas del segundo jugador a cada carta (de 1 a `deck_size`),
+                todas como bitmasks (0 si no hay jugada en el libro)
+    """
+    return struct.Struct(f'<{deck_size + 2}I')
+
+
+def best_moves(solver: TranspositionSolver, state: tuple) -> int:
+    """
+        Calcula las mejores jugadas del jugador que mueve en un estado, según su win rate
+        (victorias sobre victorias mas derrotas de cada jugada, como `game.node.Node.win_rate`).
+
+        Args:
+            solver (TranspositionSolver): Solver utilizado para evaluar las jugadas
+            state (tuple): Estado de la partida (no terminal)
+
+        Returns:
+            int: Bitmask con todas las cartas de mejor win rate (0 si alguna jugada no tiene ganador).
+                Las cartas que superan el limite tienen todas el mismo win rate (0)
+    """
+    side = state[3]
+    mover_mask = state[side]
+    win_rates = {}
+    remaining = mover_mask
+    while remaining:
+        bit = remaining & -remaining
+        remaining ^= bit
+        card = bit.bit_length() - 1
+        _, first_wins, second_wins = solver.evaluate(play_card(state, card))
+        wins, loses = (first_wins, second_wins) if side == 0 else (second_wins, first_wins)
+        if wins + loses:
+            win_rates[card] = ((wins) * (100)) / (wins + loses)
+
+    if len(win_rates) < mask_count(mover_mask):
+        return 0  # Alguna jugada no tiene ganador, el win rate no puede compararse
+    best_win_rate = max(win_rates.values())
+    return hand_mask(card for card, win_rate in win_rates.items() if win_rate == best_win_rate)
+
+
+def solve_deals(deck_size: int, limit: int, first_hands: list) -> list:
+    """
+        Calcula los registros de un conjunto de repartos (es la unidad de trabajo de cada proceso).\n
+        Todos los repartos comparten el mismo solver: los estados solo dependen de las cartas que le quedan
+        a cada jugador, por lo que los estados a los que se llega desde distintos repartos se resuelven una única vez.
+
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+            limit (int): Limite máximo de la partida
+            first_hands (list): Manos del primer jugador de cada reparto
+
+        Returns:
+            list: Registros de cada reparto, como tuplas de enteros (ver `record_struct`)
+    """
+    deck = range(1, deck_size + 1)
+    solver = TranspositionSolver([], [], limit)
+    records = []
+    for first_cards in first_hands:
+        if len(solver) > MAX_TABLE_SIZE:
+            solver.table = {}
+        second_cards = [card for card in deck if card not in first_cards]
+        state = initial_state(first_cards, second_cards, limit)
+        replies = [0] * deck_size
+        for card in first_cards:
+            child_state = play_card(state, card)
+            if child_state[2] >= 0:  # Si la primera carta supera el limite, la partida termina
+                replies[card - 1] = best_moves(solver, child_state)
+        records.append((state[0], best_moves(solver, state), *replies))
+    return records
+
+
+def build_opening_book(deck_size: int, limit: int, workers: int = 1) -> list:
+    """
+        Calcula los registros del libro de aperturas de una configuración, repartiendo
+        los repartos entre varios procesos.
+
+        Args:
+            deck_size (int): Cantidad de cartas del mazo
+            limit (int): Limite máximo de la partida
+            workers (int): Cantidad de procesos
+
+        Returns:
+            list: Registros de todos los repartos, ordenados por la mano del primer jugador
+    """
+    if not 2 <= deck_size <= MAX_DECK_SIZE:
+        raise ValueError(f'La cantidad de cartas debe estar entre 2 y {MAX_DECK_SIZE}')
+
+    first_hands = [list(hand) for hand in itertools.combinations(range(1, deck_size + 1), deck_size // 2)]
+    chunks = [first_hands[i::workers] for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(solve_deals, deck_size, limit, chunk) for chunk in chunks if chunk]
+        records = [record for future in futures for record in future.result()]
+    return sorted(records)
+
+
+def write_opening_book(path: str, deck_size: int, limit: int, records: list):
+    """
+        Args:
+            path (str): Ruta del libro de aperturas
+            deck_size (int): Cantidad de cartas del mazo
+            limit (int): Limite máximo de la partida
+            records (list): Registros ordenados por la mano del primer jugador (ver `build_opening_book`)
+    """
+    record = record_struct(deck_size)
+    with open(path, 'wb') as file_buffer:
+        file_buffer.write(HEADER.pack(MAGIC, VERSION, deck_size, limit, len(records)))
+        for values in records:
+            file_buffer.write(record.pack(*values))
+
+
+class OpeningBook:
+    """
+        Lector de los libros de aperturas escritos por `write_opening_book`.\n
+        Solo se mantienen en memoria el contenido del archivo y las manos del primer jugador
+        de cada registro (para la búsqueda binaria), los registros se decodifican al consultarlos.
+
+        Attributes:
+            path (str): Ruta del libro de aperturas
+            deck_size (int): Cantidad de cartas del mazo de la configuración
+            limit (int): Limite máximo de la partida de la configuración
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file_buffer:
+            self._buffer = file_buffer.read()
+
+        magic, version, self.deck_size, self.limit, q_records = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'El archivo <{path}> no es un libro de aperturas valido')
+        self._record = record_struct(self.deck_size)
+        self._keys = array('I', (self._record.unpack_from(self._buffer, HEADER.size + i * self._record.size)[0] for i in range(q_records)))
+
+    def covers(self, first_cards: list, second_cards: list, limit: int) -> bool:
+        """
+            Returns:
+                bool: Verdadero si el reparto y el limite corresponden a la configuración del libro
+        """
+        return limit == self.limit and sorted(first_cards + second_cards) == list(range(1, self.deck_size + 1))
+
+    def best_moves(self, first_cards: list, played_cards: list) -> int:
+        """
+            Args:
+                first_cards (list): Mano original del primer jugador
+                played_cards (list): Cartas jugadas hasta el momento (ninguna o la primera jugada)
+
+            Returns:
+                int: Bitmask con las mejores jugadas del jugador que mueve (0 si no están en el libro)
+        """
+        key = hand_mask(first_cards)
+        index = bisect.bisect_left(self._keys, key)
+        if index == len(self._keys) or self._keys[index] != key or len(played_cards) > 1:
+            return 0
+
+        values = self._record.unpack_from(self._buffer, HEADER.size + index * self._record.size)
+        if not played_cards:
+            return values[1]
+        return values[1 + played_cards[0]]
+
+
+@functools.lru_cache(maxsize=None)
+def load_opening_book(path: str) -> OpeningBook:
+    """
+        Carga un libro de aperturas, una única vez por proceso.
+
+        Args:
+            path (str): Ruta del libro de aperturas
+
+        Returns:
+            OpeningBook: Libro de aperturas
+    """
+    return OpeningBook(path)
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='Genera el libro de aperturas de una configuración')
+    parser.add_argument('--deck-size', type=int, required=True, help='Cantidad de cartas del mazo')
+    parser.add_argument('--limit', type=int, required=True, help='Limite máximo de la partida')
+    parser.add_argument('--workers', type=int, default=1, help='Cantidad de procesos')
+    parser.add_argument('--output', required=True, help='Ruta donde guardar el libro de aperturas')
+    args = parser.parse_args(argv)
+
+    records = build_opening_book(args.deck_size, args.limit, args.workers)
+    write_opening_book(args.output, args.deck_size, args.limit, records)
+    print(f'Libro de aperturas con {len(records)} repartos guardado en {args.output}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import sqlite3
+
+
+class PositionCache:
+    """
+        Esta clase implementa un cache persistente (SQLite) de posiciones ya resueltas
+        por `game.solver.TranspositionSolver`.\n
+        Las posiciones se guardan con la misma clave que la tabla de transposición
+        (ver `game.solver.canonical_key`). Como las máscaras representan los valores
+        de las cartas (y no su posición en la mano) y el limite guardado es el limite restante,
+        una posición resuelta sirve para cualquier partida en la que se repita, sin importar
+        como se repartieron las cartas. De esta forma, partidas sucesivas (y distintos procesos
+        apuntando al mismo archivo) van reutilizando lo ya resuelto.\n
+        La conexión se abre recién cuando se la necesita, y no forma parte del estado copiado
+        de la instancia (ver `__getstate__`), por lo que las instancias pueden copiarse en
+        profundidad o enviarse a otros procesos.\n
+        La versión del esquema se guarda en el archivo (`PRAGMA user_version`): si un archivo fue
+        creado con otra versión, sus posiciones se descartan al abrirlo.
+
+        Attributes:
+            path (str): Ruta al archivo SQLite del cache
+            SCHEMA_VERSION (int): Versión del esquema (y de la clave) de las posiciones guardadas
+    """
+    SCHEMA_VERSION = 2
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = None
+
+    def __getstate__(self) -> dict:
+        return {'path': self.path}
+
+    def __setstate__(self, state: dict):
+        self.path = state['path']
+        self._connection = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            with self._connection:
+                if self._connection.execute('PRAGMA user_version').fetchone()[0] != self.SCHEMA_VERSION:
+                    self._connection.execute('DROP TABLE IF EXISTS positions')  # Claves de otra versión, no sirven
+                    self._connection.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS positions ('
+                    'first_mask INTEGER, second_mask INTEGER, first_dead INTEGER, second_dead INTEGER, mount INTEGER, side INTEGER, '
+                    'value INTEGER, first_wins TEXT, second_wins TEXT, '
+                    'PRIMARY KEY (first_mask, second_mask, first_dead, second_dead, mount, side)) WITHOUT ROWID'
+                )
+        return self._connection
+
+    def get(self, key: tuple) -> tuple:
+        """
+            Args:
+                key (tuple): Clave canónica del estado `(first_live, second_live, first_dead, second_dead, limit, side)`
+
+            Returns:
+                tuple: `(valor, victorias_primer_jugador, victorias_segundo_jugador)`, o None
+                    si la posición no se encuentra en el cache
+        """
+        row = self.connection.execute(
+            'SELECT value, first_wins, second_wins FROM positions '
+            'WHERE first_mask = ? AND second_mask = ? AND first_dead = ? AND second_dead = ? AND mount = ? AND side = ?', key
+        ).fetchone()
+        if row is None:
+            return None
+        # Las victorias se guardan como texto puesto que pueden superar el rango de los enteros de SQLite
+        return (row[0], int(row[1]), int(row[2]))
+
+    def get_reachable(self, first_mask: int, second_mask: int, limit: int) -> dict:
+        """
+            Lee con una única consulta todas las posiciones del cache que pueden alcanzarse desde un
+            estado: aquellas cuyas cartas (que todavía entran en el limite) son parte de las manos del
+            estado y cuyo limite restante no es mayor (puede incluir posiciones que no se alcanzan).
+
+            Args:
+                first_mask (int): Bitmask de la mano del primer jugador
+                second_mask (int): Bitmask de la mano del segundo jugador
+                limit (int): Limite restante
+
+            Returns:
+                dict: Clave canónica -> `(valor, victorias_primer_jugador, victorias_segundo_jugador)`
+        """
+        all_cards = (1 << 62) - 1  # Las máscaras se guardan como enteros de 64 bits con signo
+        rows = self.connection.execute(
+            'SELECT first_mask, second_mask, first_dead, second_dead, mount, side, value, first_wins, second_wins FROM positions '
+            'WHERE first_mask & ? = 0 AND second_mask & ? = 0 AND mount <= ?', (all_cards ^ first_mask, all_cards ^ second_mask, limit)
+        )
+        return {row[:6]: (row[6], int(row[7]), int(row[8])) for row in rows}
+
+    def put_many(self, positions: list):
+        """
+            Guarda en el cache un conjunto de posiciones resueltas.
+
+            Args:
+                positions (list): Lista de tuplas `(clave, resultado)`
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key + (result[0], str(result[1]), str(result[2])) for key, result in positions)
+            )
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,381 @@
+"""
+    Modo servidor: aloja muchas partidas simultaneas, cuyas jugadas humanas llegan por HTTP
+    (ver las rutas `/matches` de `app.py`).
+
+    A diferencia de `Game.start()`, una partida del servidor no bloquea esperando al jugador:
+    avanza cada vez que llega una jugada. Las jugadas de los jugadores CPU se calculan en un
+    pool de procesos, de forma que el armado de un cerebro grande no frena al resto de las partidas.\n
+    Cada partida se asigna a un único proceso del pool, que mantiene el cerebro de sus jugadores CPU
+    entre jugadas (como en `Game.play_match()`), por lo que el cerebro se arma una única vez por partida.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from game import exceptions
+from game.game_controller import Game
+from game.mcts_controller import MCTSBrain
+from game.metrics import describe
+from game.node import Node
+
+
+IDLE_BRAINS_PER_CONFIG = 4  # Cerebros reiniciados que guarda cada proceso por configuración, para las próximas partidas
+
+_match_brains = {}  # (id de la partida, id del jugador) -> (cerebro, cartas jugadas luego de su ultima jugada, configuración), de este proceso
+_idle_brains = {}  # Configuración -> cerebros reiniciados (ver `CPUBrain.reset()`), de este proceso
+
+
+def _brain_config(brain_class: type, brain_options: dict, who_am_i: str, alias: str) -> tuple:
+    return (brain_class, who_am_i, alias, tuple(sorted(brain_options.items())))
+
+
+def compute_cpu_move(match_id: str, brain_class: type, brain_options: dict, who_am_i: str, alias: str, my_cards: list, rival_cards: list,
+                     limit: int, played_cards: list) -> int:
+    """
+        Calcula la jugada de un jugador CPU de una partida (es la unidad de trabajo del pool de procesos).\n
+        Cada partida se juega siempre en el mismo proceso (ver `MatchServer`), que guarda el cerebro de sus
+        jugadores CPU entre jugadas: si el cerebro de la jugada anterior está disponible, solo sigue la ultima
+        jugada del rival (como en `Game.play_match()`). Si no (primera jugada del jugador, o el proceso
+        fue reemplazado), el cerebro se arma desde la posición actual, tomando al jugador CPU como el primero en
+        mover y al monto restante como limite (el subárbol de la posición actual es el mismo que el del cerebro
+        armado al comienzo de la partida). Los cerebros se reutilizan entre partidas con la misma configuración,
+        conservando lo que no depende del reparto (ver `CPUBrain.reset()`).
+
+        Args:
+            match_id (str): Id de la partida
+            brain_class (type): Clase del jugador CPU (`CPUBrain` o `MCTSBrain`)
+            brain_options (dict): Opciones del cerebro (ver `main.load_brain_options` y `main.load_mcts_options`)
+            who_am_i (str): Id del jugador CPU
+            alias (str): Alias del jugador CPU
+            my_cards (list): Cartas que le quedan al jugador CPU
+            rival_cards (list): Cartas que le quedan al rival
+            limit (int): Monto que resta para llegar al limite
+            played_cards (list): Cartas jugadas en la partida, en orden
+
+        Returns:
+            int: Carta elegida
+    """
+    config = _brain_config(brain_class, brain_options, who_am_i, alias)
+    brain, q_played, _ = _match_brains.pop((match_id, who_am_i), (None, None, None))
+    if brain is not None and q_played + 1 == len(played_cards) and sorted(brain.my_cards) == sorted(my_cards):
+        card = brain.play_a_move(played_cards[-1])  # El rival jugó una única carta desde la jugada anterior
+    else:
+        idle = _idle_brains.get(config)
+        if idle:
+            brain = idle.pop()
+            brain.reset(limit)
+        else:
+            brain = brain_class(who_am_i, Node(None, limit, 0), alias, os.devnull, **dict(brain_options, verbose=False))
+        brain.my_cards = list(my_cards)
+        brain.prepare_brain(my_cards, rival_cards, who_am_i, limit)
+        card = brain.play_a_move(None)
+
+    _match_brains[(match_id, who_am_i)] = (brain, len(played_cards) + 1, config)
+    return card
+
+
+def release_match_brains(match_id: str):
+    """
+        Libera los cerebros de una partida que terminó (o se eliminó) en este proceso, guardándolos
+        reiniciados para las próximas partidas con la misma configuración.
+
+        Args:
+            match_id (str): Id de la partida
+    """
+    for key in [key for key in _match_brains if key[0] == match_id]:
+        brain, _, config = _match_brains.pop(key)
+        idle = _idle_brains.setdefault(config, [])
+        if len(idle) < IDLE_BRAINS_PER_CONFIG:
+            brain.reset()
+            idle.append(brain)
+
+
+class Match:
+    """
+        Partida alojada en el servidor.\n
+        Mantiene el estado de la partida (orden de los jugadores, manos, monto y cartas jugadas)
+        y lo avanza de a una jugada, con las mismas reglas que `Game.play_match()`.\n
+        Los controladores de los jugadores son los del juego configurado (no se copian): la partida solo
+        guarda las manos, y los cerebros de los jugadores CPU viven en el proceso asignado (ver `compute_cpu_move`).
+
+        Attributes:
+            id (str): Id de la partida
+            players (dict): Ids de los jugadores como clave y los controladores del juego configurado como valor (solo lectura)
+            hands (dict): Ids de los jugadores como clave y las cartas que les quedan como valor
+            cpu_players (tuple): Ids de los jugadores CPU
+            limit (int): Limite máximo para el monto de descarte
+            players_order (list): Ids de los jugadores en orden
+            mount (int): Monto actual
+            played_cards (list): Cartas jugadas, en orden
+            winner (str): Id del ganador (None si la partida no terminó o terminó sin ganador)
+            finished (bool): Verdadero si la partida terminó
+            error (str): Error al calcular la jugada de un jugador CPU (None si no hubo errores)
+            worker (int): Índice del proceso del pool que calcula las jugadas CPU de la partida
+            updated_at (float): Momento (`time.monotonic()`) de la ultima jugada, para descartar las partidas viejas
+            lock (threading.RLock): Lock para modificar la partida (reentrante, ya que la jugada de un
+                jugador CPU puede aplicarse en el mismo hilo que la encoló si termina antes de registrar el callback)
+    """
+    def __init__(self, match_id: str, game: Game, worker: int = 0):
+        self.id = match_id
+        self.players = {player: mapping['instance'] for player, mapping in game.players_name_mapping.items()}
+        self.cpu_players = tuple(game.cpu_players)
+        self.limit = game.maximum_mount_limit
+        self.players_order = game.decide_first_player()
+
+        deck = game.create_deck()
+        self.hands = {
+            self.players_order[0]: deck[:int((len(deck)/2))],
+            self.players_order[1]: deck[int((len(deck)/2)):],
+        }
+
+        self.mount = 0
+        self.played_cards = []
+        self.winner = None
+        self.finished = False
+        self.error = None
+        self.worker = worker
+        self.updated_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    @property
+    def to_move(self) -> str:
+        """
+            Returns:
+                str: Id del jugador al que le toca mover (None si la partida terminó)
+        """
+        if self.finished:
+            return None
+        return self.players_order[len(self.played_cards) % 2]
+
+    def _check_cards_left(self):
+        if not self.hands[self.to_move]:  # No quedan cartas por jugar, la partida termina sin ganador
+            self.finished = True
+
+    def apply_move(self, player: str, card: int):
+        """
+            Aplica el descarte de una carta.
+
+            Args:
+                player (str): Id del jugador que descarta
+                card (int): Carta descartada
+
+            Raises:
+                WrongOrderError: Si la partida terminó o no es el turno del jugador
+                WrongMoveError: Si el jugador no tiene la carta
+        """
+        if player != self.to_move:
+            raise exceptions.WrongOrderError(f'No es el turno del jugador <{player}>')
+        hand = self.hands[player]
+        if card not in hand:
+            raise exceptions.WrongMoveError(f'El jugador <{player}> no tiene la carta <{card}>')
+
+        del hand[hand.index(card)]
+        self.played_cards.append(card)
+        self.mount += card
+        self.updated_at = time.monotonic()
+        if self.mount > self.limit:
+            self.finished = True
+            self.winner = self.players_order[len(self.played_cards) % 2]  # Gana el rival de quien descartó
+        else:
+            self._check_cards_left()
+
+    def as_dict(self) -> dict:
+        """
+            Returns:
+                dict: Estado público de la partida (las cartas de los jugadores CPU no se muestran)
+        """
+        return {
+            'id': self.id,
+            'players_order': self.players_order,
+            'cpu_players': list(self.cpu_players),
+            'limit': self.limit,
+            'mount': self.mount,
+            'played_cards': self.played_cards,
+            'to_move': self.to_move,
+            'cpu_thinking': self.to_move in self.cpu_players and self.error is None,
+            'finished': self.finished,
+            'winner': self.winner,
+            'error': self.error,
+            'cards': {player: hand for player, hand in self.hands.items() if player not in self.cpu_players},
+        }
+
+
+class MatchServer:
+    """
+        Aloja muchas partidas simultaneas.\n
+        Las jugadas humanas llegan por medio de `self.play()`, y cuando le toca mover a un jugador CPU
+        su jugada se calcula en un pool de procesos (ver `compute_cpu_move`). Al terminar el cálculo
+        la jugada se aplica a la partida (y si le vuelve a tocar a un CPU, se encola la siguiente),
+        por lo que las partidas CPU vs. CPU se juegan solas en segundo plano.\n
+        Cada partida se asigna al proceso con menos partidas en curso, y todas sus jugadas CPU se calculan
+        en ese proceso, que mantiene los cerebros de la partida hasta que la misma termina.\n
+        Las partidas terminadas se descartan luego de `finished_ttl` segundos (para que los clientes puedan
+        consultar el resultado), y las que no reciben jugadas luego de `idle_ttl` segundos.
+
+        Attributes:
+            game (Game): Juego configurado, utilizado como plantilla de cada partida
+            brain_options (dict): Opciones de los cerebros de los jugadores CPU
+            mcts_options (dict): Opciones de los jugadores MCTS
+            matches (dict): Partidas alojadas, por id
+            executors (list): Procesos para las jugadas de los jugadores CPU (un `ProcessPoolExecutor` de
+                un único proceso cada uno, para que las jugadas de una partida siempre se calculen en el mismo)
+            finished_ttl (float): Segundos que se conserva una partida terminada
+            idle_ttl (float): Segundos que se conserva una partida sin jugadas
+            cpu_move_latencies_ms (list): Latencia de cada jugada CPU (desde que se encola hasta que se aplica),
+                en milisegundos
+    """
+    def __init__(self, game: Game, brain_options: dict, workers: int = None, mcts_options: dict = None, finished_ttl: float = 300,
+                 idle_ttl: float = 3600):
+        limit_validation = game.validate_limit()
+        if not limit_validation[0]:
+            raise exceptions.WrongGameConfigurationError(f'Ha provisto un limite que no se encuentra entre los limites: {game.lower_threshold_limit} < x < {game.higher_threshold_limit}')
+
+        self.game = game
+        self.brain_options = brain_options
+        self.mcts_options = mcts_options or {}
+        self.matches = {}
+        self.executors = [ProcessPoolExecutor(max_workers=1) for _ in range(workers or os.cpu_count() or 1)]
+        self.finished_ttl = finished_ttl
+        self.idle_ttl = idle_ttl
+        self.cpu_move_latencies_ms = []
+        self._worker_matches = [0] * len(self.executors)  # Partidas en curso de cada proceso
+        self._released = set()  # Partidas cuyos cerebros ya se liberaron
+        self._q_finished = 0
+        self._q_evicted = 0
+        self._lock = threading.Lock()
+
+    def create_match(self) -> Match:
+        """
+            Returns:
+                Match: Nueva partida (si el primer jugador es CPU, su jugada ya queda encolada)
+        """
+        with self._lock:
+            self._evict_expired()
+            worker = self._worker_matches.index(min(self._worker_matches))
+            self._worker_matches[worker] += 1
+            match = Match(uuid.uuid4().hex, self.game, worker)
+            self.matches[match.id] = match
+        with match.lock:
+            match._check_cards_left()
+            self._after_move(match)
+        return match
+
+    def get_match(self, match_id: str) -> Match:
+        """
+            Raises:
+                KeyError: Si no existe la partida
+        """
+        with self._lock:
+            self._evict_expired()
+            return self.matches[match_id]
+
+    def remove_match(self, match_id: str):
+        with self._lock:
+            match = self.matches.pop(match_id)
+            self._release(match)
+            self._released.discard(match.id)  # Ya no puede volver a liberarse
+
+    def _release(self, match: Match):
+        """
+            Libera los cerebros de una partida en su proceso (una única vez por partida).
+            Se llama con el lock del servidor tomado.
+        """
+        if match.id in self._released:
+            return
+        self._released.add(match.id)
+        self._worker_matches[match.worker] -= 1
+        self.executors[match.worker].submit(release_match_brains, match.id)
+
+    def _evict_expired(self):
+        """
+            Descarta las partidas terminadas hace mas de `self.finished_ttl` segundos, y las que no
+            reciben jugadas hace mas de `self.idle_ttl` segundos. Se llama con el lock del servidor tomado.
+        """
+        now = time.monotonic()
+        expired = [match for match in self.matches.values()
+                   if now - match.updated_at > (self.finished_ttl if match.finished else self.idle_ttl)]
+        for match in expired:
+            del self.matches[match.id]
+            self._release(match)
+            self._released.discard(match.id)  # Ya no puede volver a liberarse
+        self._q_evicted += len(expired)
+
+    def metrics(self) -> dict:
+        """
+            Returns:
+                dict: Cantidad de partidas alojadas, terminadas (desde que se creó el servidor) y descartadas,
+                    y latencia de las jugadas CPU
+        """
+        with self._lock:
+            self._evict_expired()
+            q_matches = len(self.matches)
+            latencies = list(self.cpu_move_latencies_ms)
+            q_finished, q_evicted = self._q_finished, self._q_evicted
+        return {
+            'matches': q_matches,
+            'finished': q_finished,
+            'evicted': q_evicted,
+            'cpu_move_latency_ms': describe(latencies),
+        }
+
+    def play(self, match_id: str, player: str, card: int) -> Match:
+        """
+            Aplica la jugada de un jugador humano.
+
+            Raises:
+                KeyError: Si no existe la partida
+                WrongOrderError: Si la partida terminó, o no es el turno del jugador
+                WrongMoveError: Si el jugador es CPU o no tiene la carta
+        """
+        match = self.get_match(match_id)
+        if player in match.cpu_players:
+            raise exceptions.WrongMoveError(f'El jugador <{player}> es CPU, sus jugadas las calcula el servidor')
+
+        with match.lock:
+            match.apply_move(player, card)
+            self._after_move(match)
+        return match
+
+    def _after_move(self, match: Match):
+        # Se llama con el lock de la partida tomado
+        with self._lock:
+            if self.matches.get(match.id) is not match:  # La partida se eliminó mientras un CPU pensaba su jugada
+                self.executors[match.worker].submit(release_match_brains, match.id)
+                return
+            if match.finished:
+                self._q_finished += 1
+                self._release(match)
+                return
+        self._schedule_cpu_move(match)
+
+    def _schedule_cpu_move(self, match: Match):
+        # Se llama con el lock de la partida tomado
+        player = match.to_move
+        if player not in match.cpu_players:
+            return
+
+        instance = match.players[player]
+        rival = match.players_order[0] if player == match.players_order[1] else match.players_order[1]
+        brain_options = self.mcts_options if isinstance(instance, MCTSBrain) else self.brain_options
+        future = self.executors[match.worker].submit(compute_cpu_move, match.id, type(instance), brain_options, player, instance.alias,
+                                                     list(match.hands[player]), list(match.hands[rival]), match.limit - match.mount,
+                                                     list(match.played_cards))
+        submitted = time.perf_counter()
+        future.add_done_callback(lambda done: self._apply_cpu_move(match, player, done, submitted))
+
+    def _apply_cpu_move(self, match: Match, player: str, future, submitted: float):
+        with match.lock:
+            try:
+                match.apply_move(player, future.result())
+            except Exception as exc:  # La partida queda frenada, informando el error
+                match.error = f'{type(exc).__name__}: {exc}'
+                return
+            with self._lock:
+                self.cpu_move_latencies_ms.append((time.perf_counter() - submitted) * 1000)
+            self._after_move(match)
+
+    def shutdown(self):
+        for executor in self.executors:
+            executor.shutdown(wait=False)
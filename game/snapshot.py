@@ -0,0 +1,190 @@
+import math
+import mmap
+import os
+import struct
+from collections import deque
+
+MAGIC = b'CTBS'
+VERSION = 1
+HEADER = struct.Struct('<4sHI8s8s')  # magic, versión, cantidad de nodos, ids del primer y segundo jugador
+RECORD = struct.Struct('<hiHBBfQQIH')  # carta, monto, profundidad, quien mueve, quien gana, valor heurístico, victorias, derrotas, primer hijo, cantidad de hijos
+
+NO_CARD = -1
+NO_PLAYER = 255
+NO_WINNER = 2
+MAX_COUNT = 2 ** 64 - 1
+
+
+def write_snapshot(root, path: str, players: tuple, max_depth: int = None, max_nodes: int = None):
+    """
+        Escribe un snapshot binario del subárbol de un nodo.\n
+        Cada nodo ocupa un registro de tamaño fijo (`RECORD`) y los nodos se escriben
+        recorriendo el árbol a lo ancho, de esta forma los hijos de cada nodo quedan
+        contiguos y alcanza con guardar el índice del primer hijo y la cantidad de hijos.
+        Esto permite leer cualquier nodo (y sus hijos) sin leer el resto del archivo
+        (ver `BrainSnapshot`).\n
+        Los registros se escriben a medida que se recorre el árbol en un archivo temporal,
+        que al terminar reemplaza al snapshot anterior (los lectores que lo tengan abierto
+        siguen viendo la versión anterior).
+
+        Args:
+            root (Node): Raiz del subárbol a guardar (puede ser cualquier nodo con la interfaz de `game.node.Node`)
+            path (str): Ruta del snapshot
+            players (tuple): Ids del primer y segundo jugador
+            max_depth (int): Profundidad máxima a guardar, relativa a la raiz (None para no acotarla)
+            max_nodes (int): Cantidad máxima de nodos a guardar (None para no acotarla). Los hijos
+                de un nodo se guardan todos o ninguno
+    """
+    player_index = {players[0]: 0, players[1]: 1}
+    tmp_path = f'{path}.tmp'
+    q_nodes = 1
+    with open(tmp_path, 'wb') as file_buffer:
+        file_buffer.write(HEADER.pack(MAGIC, VERSION, 0, players[0].encode(), players[1].encode()))
+        queue = deque([(root, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            childs = node.childs if max_depth is None or depth < max_depth else []
+            if max_nodes is not None and q_nodes + len(childs) > max_nodes:
+                childs = []
+
+            heuristic_value = node.heuristic_value
+            file_buffer.write(RECORD.pack(
+                NO_CARD if node.data is None else node.data,
+                node.mount_count,
+                node.depth,
+                player_index.get(node.how_moves, NO_PLAYER),
+                player_index.get(node.how_wins, NO_WINNER),
+                math.nan if heuristic_value is None else heuristic_value,
+                min(node.wins, MAX_COUNT),
+                min(node.loses, MAX_COUNT),
+                q_nodes if childs else 0,
+                len(childs),
+            ))
+            q_nodes += len(childs)
+            queue.extend((child, depth + 1) for child in childs)
+
+        file_buffer.seek(0)
+        file_buffer.write(HEADER.pack(MAGIC, VERSION, q_nodes, players[0].encode(), players[1].encode()))
+    os.replace(tmp_path, path)
+
+
+class BrainSnapshot:
+    """
+        Lector de los snapshots binarios escritos por `write_snapshot`.\n
+        El archivo se mapea en memoria (mmap) y cada nodo se decodifica recién cuando
+        se lo pide, por lo que leer un nodo y sus hijos no requiere cargar ni parsear
+        el resto del archivo.\n
+        Los nodos se identifican por su índice (la raiz es el índice 0), o por el camino
+        de cartas jugadas desde la raiz (ver `self.find()`).
+
+        Attributes:
+            path (str): Ruta del snapshot
+            players (tuple): Ids del primer y segundo jugador
+            q_nodes (int): Cantidad de nodos del snapshot
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file_buffer:
+            self._buffer = mmap.mmap(file_buffer.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.q_nodes, first_player, second_player = HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'El archivo <{path}> no es un snapshot de cerebro valido')
+        self.players = (first_player.rstrip(b'\0').decode(), second_player.rstrip(b'\0').decode())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._buffer.close()
+
+    def _record(self, index: int) -> tuple:
+        if not 0 <= index < self.q_nodes:
+            raise IndexError(f'El snapshot no tiene un nodo con índice {index}')
+        return RECORD.unpack_from(self._buffer, HEADER.size + index * RECORD.size)
+
+    def node(self, index: int) -> dict:
+        """
+            Args:
+                index (int): Índice del nodo
+
+            Returns:
+                dict: Datos del nodo (análogos a los atributos de `game.node.Node`)
+        """
+        card, mount_count, depth, how_moves, how_wins, heuristic_value, wins, loses, first_child, child_count = self._record(index)
+        if math.isnan(heuristic_value):
+            heuristic_value = None
+        elif heuristic_value.is_integer():
+            heuristic_value = int(heuristic_value)
+
+        return {
+            'index': index,
+            'card': None if card == NO_CARD else card,
+            'mount_count': mount_count,
+            'depth': depth,
+            'how_moves': None if how_moves == NO_PLAYER else self.players[how_moves],
+            'how_wins': 'n/a' if how_wins == NO_WINNER else self.players[how_wins],
+            'heuristic_value': heuristic_value,
+            'wins': wins,
+            'loses': loses,
+            'win_rate': (wins * 100) / (wins + loses) if wins + loses else 'n/a',
+            'child_count': child_count,
+        }
+
+    def children(self, index: int) -> list:
+        """
+            Args:
+                index (int): Índice del nodo
+
+            Returns:
+                list: Índices de los hijos del nodo
+        """
+        first_child, child_count = self._record(index)[-2:]
+        return list(range(first_child, first_child + child_count))
+
+    def find(self, path: list) -> int:
+        """
+            Busca un nodo a partir del camino de cartas jugadas desde la raiz.
+
+            Args:
+                path (list): Cartas jugadas desde la raiz del snapshot
+
+            Returns:
+                int: Índice del nodo, o None si el camino no existe en el snapshot
+        """
+        index = 0
+        for card in path:
+            for child in self.children(index):
+                if self._record(child)[0] == card:
+                    index = child
+                    break
+            else:
+                return None
+        return index
+
+    def get(self, path: list, depth: int = 1) -> dict:
+        """
+            Devuelve un nodo (buscado por su camino de cartas) junto a sus descendientes
+            hasta una profundidad dada.
+
+            Args:
+                path (list): Cartas jugadas desde la raiz del snapshot
+                depth (int): Cantidad de niveles de descendientes a incluir
+
+            Returns:
+                dict: Datos del nodo, con sus hijos en la clave `childs`; None si el camino no existe
+        """
+        index = self.find(path)
+        if index is None:
+            return None
+        return self._subtree(index, depth)
+
+    def _subtree(self, index: int, depth: int) -> dict:
+        node = self.node(index)
+        if depth > 0:
+            node['childs'] = [self._subtree(child, depth - 1) for child in self.children(index)]
+        return node
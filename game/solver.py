@@ -0,0 +1,523 @@
+import time
+
+from game.endgame import mask_count, mask_sum
+
+
+def hand_mask(cards: list) -> int:
+    """
+        Convierte una mano (lista de cartas) a su representación como bitmask.\n
+        El bit `n` encendido indica que la carta de valor `n` sigue disponible.
+
+        Args:
+            cards (list): Cartas de la mano
+
+        Returns:
+            int: Bitmask de la mano
+    """
+    mask = 0
+    for card in cards:
+        mask |= 1 << card
+    return mask
+
+
+def canonical_key(first_mask: int, second_mask: int, limit: int, side: int) -> tuple:
+    """
+        Devuelve la clave canónica de un estado (no terminal).\n
+        Las cartas que superan el limite restante son todas equivalentes: jugarlas pierde de
+        inmediato, y como el limite nunca aumenta no vuelven a entrar. Por ende el resultado de un
+        estado solo depende de las cartas de cada mano que todavía entran en el limite y de la
+        cantidad (no el valor) de cartas que lo superan, y todos los estados que solo difieren en
+        esas cartas comparten la misma clave.
+
+        Args:
+            first_mask (int): Bitmask de la mano del primer jugador
+            second_mask (int): Bitmask de la mano del segundo jugador
+            limit (int): Limite restante (no negativo)
+            side (int): Lado que mueve (0 el primer jugador, 1 el segundo)
+
+        Returns:
+            tuple: `(first_live, second_live, first_dead, second_dead, limit, side)`
+    """
+    shift = limit + 1
+    first_dead = first_mask >> shift
+    second_dead = second_mask >> shift
+    return (first_mask ^ (first_dead << shift), second_mask ^ (second_dead << shift),
+            mask_count(first_dead) if first_dead else 0, mask_count(second_dead) if second_dead else 0, limit, side)
+
+
+def collapse_moves(cards: list, limit: int) -> tuple:
+    """
+        Agrupa las jugadas equivalentes de una mano: las cartas que superan el limite pierden
+        todas de inmediato, por lo que solo se considera la primera de ellas (en el orden de la
+        mano) como representante de todas.
+
+        Args:
+            cards (list): Cartas del jugador que mueve
+            limit (int): Limite restante
+
+        Returns:
+            tuple: `(posiciones, q_dead)`, con las posiciones (iterable) en la mano de las jugadas a considerar
+                y la cantidad de cartas que superan el limite (representadas por una única jugada)
+    """
+    if not cards or max(cards) <= limit:  # Caso mas común, todas las cartas entran en el limite
+        return range(len(cards)), 0
+
+    positions = []
+    q_dead = 0
+    for i, card in enumerate(cards):
+        if card > limit:
+            q_dead += 1
+            if q_dead > 1:
+                continue
+        positions.append(i)
+    return positions, q_dead
+
+
+def mask_cards(hand: list, mask: int) -> list:
+    """
+        Devuelve las cartas de una mano que siguen disponibles en un bitmask,
+        respetando el orden original de la mano.
+
+        Args:
+            hand (list): Mano original del jugador
+            mask (int): Bitmask con las cartas disponibles
+
+        Returns:
+            list: Cartas disponibles
+    """
+    return [card for card in hand if mask & (1 << card)]
+
+
+def initial_state(first_cards: list, second_cards: list, limit: int) -> tuple:
+    """
+        Args:
+            first_cards (list): mano del primer jugador
+            second_cards (list): mano del segundo jugador
+            limit (int): Limite máximo de la partida
+
+        Returns:
+            tuple: Estado inicial de la partida `(first_mask, second_mask, limit, side)`,
+                en el que mueve el primer jugador
+    """
+    return (hand_mask(first_cards), hand_mask(second_cards), limit, 0)
+
+
+def play_card(state: tuple, card: int) -> tuple:
+    """
+        Devuelve el estado resultante de que el jugador que mueve descarte una carta.
+
+        Args:
+            state (tuple): Estado actual `(first_mask, second_mask, limit, side)`
+            card (int): Carta descartada
+
+        Returns:
+            tuple: Nuevo estado. Si su limite es negativo, el jugador que movió
+                se pasó del limite (estado terminal)
+    """
+    first_mask, second_mask, limit, side = state
+    if side == 0:
+        return (first_mask ^ (1 << card), second_mask, limit - card, 1)
+    return (first_mask, second_mask ^ (1 << card), limit - card, 0)
+
+
+class TranspositionSolver:
+    """
+        Esta clase resuelve una partida en concreto utilizando una tabla de
+        transposición (memoización) en lugar de generar el árbol completo de jugadas.\n
+        La observación clave es que un estado del juego depende únicamente de las cartas
+        que le quedan a cada jugador, del limite restante y de quien debe mover. Por ejemplo,
+        jugar 3 y luego 5 lleva al mismo estado que jugar 5 y luego 3. Por ende cada estado
+        distinto se resuelve una única vez, y el costo escala con la cantidad de estados
+        únicos y no con la cantidad de ordenamientos de jugadas.\n
+        Los estados se representan como tuplas `(first_mask, second_mask, limit, side)`, donde
+        las máscaras son los bitmask (ver `hand_mask`) de las manos del primer y segundo jugador,
+        `limit` es el limite restante y `side` indica quien mueve (0 el primer jugador, 1 el segundo).
+        Las jugadas de cartas que superan el limite no se recorren una por una, sino que se suman
+        como derrotas inmediatas del jugador que mueve. En el cache persistente los estados se guardan
+        por su clave canónica (ver `canonical_key`), de esta forma una posición resuelta sirve también
+        para las que solo difieren en cartas que ya superan el limite (en la tabla en memoria se usa el
+        estado tal cual, puesto que armar la clave canónica en cada consulta cuesta mas de lo que ahorra).\n
+        Los valores resueltos son neutrales respecto del jugador CPU que los consulta: el valor
+        heurístico se expresa desde la perspectiva del primer jugador, y se guardan las victorias
+        de cada lado por separado. Esto permite derivar en `CPUBrain` exactamente los mismos
+        valores (heurísticos y victorias/derrotas) que genera `CPUBrain.simulate_moves`.
+
+        Attributes:
+            hands (tuple): Manos originales (en orden) del primer y segundo jugador
+            limit (int): Limite máximo de la partida
+            table (dict): Tabla de transposición, mapea cada estado a la tupla
+                `(valor, victorias_primer_jugador, victorias_segundo_jugador)`
+            cache (PositionCache): Cache persistente de posiciones resueltas (opcional), se
+                consulta antes de resolver un estado y se actualiza con los estados nuevos. Las posiciones
+                alcanzables desde el estado evaluado se leen con una única consulta (ver `self.evaluate()`)
+    """
+    def __init__(self, first_cards: list, second_cards: list, limit: int, cache=None):
+        self.hands = (list(first_cards), list(second_cards))
+        self.limit = limit
+        self.table = {}
+        self.cache = cache
+        self._pending = []
+        self._prefetched = {}
+
+    def __len__(self):
+        return len(self.table)
+
+    def discard_unreachable(self, state: tuple):
+        """
+            Elimina de la tabla de transposición los estados que ya no pueden alcanzarse
+            desde un estado dado (aquellos que contienen cartas que ya fueron jugadas).
+
+            Args:
+                state (tuple): Estado actual de la partida
+        """
+        first_mask, second_mask = state[0], state[1]
+        self.table = {key: result for key, result in self.table.items() if not (key[0] & ~first_mask or key[1] & ~second_mask)}
+
+    def evaluate(self, state: tuple) -> tuple:
+        """
+            Devuelve el resultado de un estado, resolviéndolo si todavía no se
+            encuentra en la tabla de transposición.
+
+            Args:
+                state (tuple): Estado a evaluar
+
+            Returns:
+                tuple: `(valor, victorias_primer_jugador, victorias_segundo_jugador)`, el valor
+                    es 1 si gana el primer jugador, -1 si gana el segundo y 0 si no hay ganador
+        """
+        if self.cache is not None and state[2] >= 0 and state not in self.table:
+            result = self.cache.get(canonical_key(*state))
+            if result is not None:
+                self.table[state] = result
+                return result
+            # Se leen de una vez las posiciones del cache que pueden alcanzarse, en lugar de una consulta por estado
+            self._prefetched = self.cache.get_reachable(state[0], state[1], state[2])
+        result = self._solve(*state)
+        self._prefetched = {}
+        if self._pending:
+            self.cache.put_many(self._pending)
+            self._pending = []
+        return result
+
+    def _solve(self, first_mask: int, second_mask: int, limit: int, side: int) -> tuple:
+        if limit < 0:
+            # El jugador que acaba de mover se pasó del limite, gana el que le toca mover
+            return (1, 1, 0) if side == 0 else (-1, 0, 1)
+
+        key = (first_mask, second_mask, limit, side)
+        result = self.table.get(key)
+        if result is not None:
+            return result
+        if self._prefetched:
+            result = self._prefetched.get(canonical_key(*key))
+            if result is not None:
+                self.table[key] = result
+                return result
+
+        mover_mask = second_mask if side else first_mask
+        if not mover_mask:
+            # Llegue a una hoja, no hay ganador
+            result = (0, 0, 0)
+        else:
+            best = None
+            first_wins = 0
+            second_wins = 0
+            remaining = mover_mask & ((1 << (limit + 1)) - 1)  # Cartas que todavía entran en el limite
+            if remaining != mover_mask:  # Cada carta que supera el limite es una derrota inmediata del jugador que mueve
+                q_dead = mask_count(mover_mask ^ remaining)
+                if side == 0:
+                    best, second_wins = -1, q_dead
+                else:
+                    best, first_wins = 1, q_dead
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                card = bit.bit_length() - 1
+                if side == 0:
+                    value, child_first_wins, child_second_wins = self._solve(first_mask ^ bit, second_mask, limit - card, 1)
+                else:
+                    value, child_first_wins, child_second_wins = self._solve(first_mask, second_mask ^ bit, limit - card, 0)
+                first_wins += child_first_wins
+                second_wins += child_second_wins
+                if best is None or (value > best if side == 0 else value < best):  # El primer jugador maximiza, el segundo minimiza
+                    best = value
+            result = (best, first_wins, second_wins)
+
+        self.table[key] = result
+        if self.cache is not None:
+            self._pending.append((canonical_key(*key), result))
+        return result
+
+
+class AlphaBetaSolver(TranspositionSolver):
+    """
+        Esta clase resuelve una partida utilizando MiniMax (en su variante negamax) con
+        poda alfa-beta, ordenamiento de jugadas y tabla de transposición.\n
+        Puesto que los valores heurísticos posibles son solo -1, 0 y 1, las podas se dan
+        casi de inmediato: apenas se encuentra una victoria demostrada no se siguen
+        evaluando las jugadas restantes.\n
+        El ordenamiento de jugadas prueba primero las cartas mas altas que todavía entran
+        en el limite. Las cartas que sobrepasan el limite son todas equivalentes (derrota
+        inmediata), por lo que solo se consideran cuando no queda otra opción.\n
+        A diferencia de `TranspositionSolver`, esta clase no enumera todas las hojas del
+        árbol, por ende las victorias/derrotas solo se informan para los estados terminales.
+
+        Attributes:
+            table (dict): Tabla de transposición, mapea cada estado a la tupla `(valor, cota)`,
+                siendo el valor relativo al jugador que mueve en ese estado
+    """
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def evaluate(self, state: tuple) -> tuple:
+        """
+            Devuelve el valor MiniMax demostrado de un estado.
+
+            Args:
+                state (tuple): Estado a evaluar
+
+            Returns:
+                tuple: `(valor, victorias_primer_jugador, victorias_segundo_jugador)`, las victorias
+                    solo son distintas de 0 para los estados terminales
+        """
+        first_mask, second_mask, limit, side = state
+        if limit < 0:
+            return (1, 1, 0) if side == 0 else (-1, 0, 1)
+
+        value = self._negamax(first_mask, second_mask, limit, side, -1, 1)
+        return (value, 0, 0) if side == 0 else (-value, 0, 0)
+
+    def _negamax(self, first_mask: int, second_mask: int, limit: int, side: int, alpha: int, beta: int) -> int:
+        mover_mask = second_mask if side else first_mask
+        if not mover_mask:
+            # Llegue a una hoja, no hay ganador
+            return 0
+
+        playable = mover_mask & ((1 << (limit + 1)) - 1)  # Cartas que todavía entran en el limite
+        if not playable:
+            # Cualquier carta sobrepasa el limite, el jugador que mueve pierde
+            return -1
+
+        key = (first_mask, second_mask, limit, side)
+        entry = self.table.get(key)
+        if entry is not None:
+            value, bound = entry
+            if bound == self.EXACT:
+                return value
+            if bound == self.LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        original_alpha = alpha
+        best = -1
+        while playable:
+            card = playable.bit_length() - 1  # Primero las cartas mas altas
+            bit = 1 << card
+            playable ^= bit
+            if side == 0:
+                value = -self._negamax(first_mask ^ bit, second_mask, limit - card, 1, -beta, -alpha)
+            else:
+                value = -self._negamax(first_mask, second_mask ^ bit, limit - card, 0, -beta, -alpha)
+            if value > best:
+                best = value
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break  # Poda (por ejemplo, victoria demostrada)
+
+        if best <= original_alpha:
+            bound = self.UPPER
+        elif best >= beta:
+            bound = self.LOWER
+        else:
+            bound = self.EXACT
+        self.table[key] = (best, bound)
+        return best
+
+
+class SearchTimeout(Exception):
+    """
+        Se lanza cuando se agota el tiempo de una búsqueda de `IterativeDeepeningSolver`.
+    """
+    pass
+
+
+class IterativeDeepeningSolver(AlphaBetaSolver):
+    """
+        Esta clase elige jugadas con búsquedas alfa-beta acotadas en profundidad, de profundidad
+        creciente (iterative deepening), hasta agotar un tiempo por jugada.\n
+        Al llegar a la profundidad máxima de una iteración, los estados se valoran con una
+        evaluación estática (ver `self.static_evaluation()`), cuyos valores están estrictamente
+        entre -1 y 1, de esta forma las victorias y derrotas demostradas siempre se prefieren
+        a las estimadas. Cuando se agota el tiempo se devuelve la mejor jugada de la última
+        iteración completa, y si una iteración demuestra el resultado no se sigue profundizando.\n
+        La tabla de transposición guarda la profundidad con la que se resolvió cada estado y su
+        mejor jugada, que se prueba primero en la siguiente iteración.
+
+        Attributes:
+            table (dict): Tabla de transposición, mapea cada estado a la tupla
+                `(valor, cota, profundidad, mejor_carta)`, siendo el valor relativo al jugador que mueve
+    """
+    PROVEN_DEPTH = float('inf')
+    TIME_CHECK_INTERVAL = 1024
+
+    def __init__(self, first_cards: list, second_cards: list, limit: int, cache=None):
+        super().__init__(first_cards, second_cards, limit, cache)
+        self._deadline = None
+        self._q_nodes = 0
+
+    def static_evaluation(self, first_mask: int, second_mask: int, limit: int, side: int) -> float:
+        """
+            Evaluación estática de un estado, basada en el limite restante y las manos.\n
+            Se combinan dos factores: una carrera en la que cada jugador descarta siempre su carta
+            mas baja (pierde quien primero no pueda descartar sin pasarse del limite), y la suma de
+            las cartas de cada mano (tener cartas mas altas que el rival es una desventaja).
+
+            Returns:
+                float: Valor estimado del estado entre -0.75 y 0.75, relativo al jugador que mueve
+        """
+        hands = [second_mask, first_mask] if side else [first_mask, second_mask]
+        sums = [mask_sum(hands[0]), mask_sum(hands[1])]
+
+        race = 0
+        turn = 0
+        while hands[turn]:
+            lowest = hands[turn] & -hands[turn]
+            card = lowest.bit_length() - 1
+            if card > limit:
+                race = -1 if turn == 0 else 1
+                break
+            limit -= card
+            hands[turn] ^= lowest
+            turn = 1 - turn
+
+        return 0.5 * race + 0.25 * (sums[1] - sums[0]) / ((sums[0] + sums[1]) or 1)
+
+    def search(self, state: tuple, move_time_ms: int = None) -> tuple:
+        """
+            Busca la mejor jugada del jugador que mueve en un estado.
+
+            Args:
+                state (tuple): Estado actual de la partida
+                move_time_ms (int): Tiempo máximo de la búsqueda en milisegundos (None para buscar
+                    hasta demostrar el resultado). La primera iteración siempre se completa
+
+            Returns:
+                tuple: `(carta, valor, profundidad)`, con la mejor carta encontrada, su valor relativo
+                    al jugador que mueve y la profundidad de la última iteración completa
+        """
+        first_mask, second_mask, limit, side = state
+        mover_mask = second_mask if side else first_mask
+        playable = mover_mask & ((1 << (limit + 1)) - 1)
+        if not playable:  # Cualquier carta sobrepasa el limite
+            return mask_cards(self.hands[side], mover_mask)[0], -1, 0
+
+        deadline = None if move_time_ms is None else time.perf_counter() + move_time_ms / 1000
+        max_depth = bin(first_mask | second_mask).count('1')
+        best_card, best_value, reached_depth = None, None, 0
+        for depth in range(1, max_depth + 1):
+            self._deadline = deadline if depth > 1 else None
+            try:
+                card, value = self._search_root(first_mask, second_mask, limit, side, depth, playable, best_card)
+            except SearchTimeout:
+                break
+            finally:
+                self._deadline = None
+            best_card, best_value, reached_depth = card, value, depth
+            if abs(value) == 1:
+                break  # Resultado demostrado, no hace falta seguir profundizando
+
+        return best_card, best_value, reached_depth
+
+    def _search_root(self, first_mask: int, second_mask: int, limit: int, side: int, depth: int, playable: int, first_card: int) -> tuple:
+        cards = []
+        while playable:
+            card = playable.bit_length() - 1  # Primero las cartas mas altas
+            playable ^= 1 << card
+            cards.append(card)
+        if first_card is not None:  # Primero la mejor jugada de la iteración anterior
+            cards.remove(first_card)
+            cards.insert(0, first_card)
+
+        best_card, alpha = None, -1
+        for card in cards:
+            bit = 1 << card
+            if side == 0:
+                value = -self._search(first_mask ^ bit, second_mask, limit - card, 1, depth - 1, -1, -alpha)
+            else:
+                value = -self._search(first_mask, second_mask ^ bit, limit - card, 0, depth - 1, -1, -alpha)
+            if best_card is None or value > alpha:
+                best_card, alpha = card, value
+            if alpha == 1:
+                break  # Victoria demostrada
+        return best_card, alpha
+
+    def _negamax(self, first_mask: int, second_mask: int, limit: int, side: int, alpha: int, beta: int) -> int:
+        return self._search(first_mask, second_mask, limit, side, self.PROVEN_DEPTH, alpha, beta)
+
+    def _search(self, first_mask: int, second_mask: int, limit: int, side: int, depth: float, alpha: float, beta: float) -> float:
+        self._q_nodes += 1
+        if self._deadline is not None and not self._q_nodes % self.TIME_CHECK_INTERVAL and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+        mover_mask = second_mask if side else first_mask
+        if not mover_mask:
+            # Llegue a una hoja, no hay ganador
+            return 0
+
+        playable = mover_mask & ((1 << (limit + 1)) - 1)  # Cartas que todavía entran en el limite
+        if not playable:
+            # Cualquier carta sobrepasa el limite, el jugador que mueve pierde
+            return -1
+        if depth == 0:
+            return self.static_evaluation(first_mask, second_mask, limit, side)
+
+        key = (first_mask, second_mask, limit, side)
+        entry = self.table.get(key)
+        first_card = None
+        if entry is not None:
+            value, bound, entry_depth, first_card = entry
+            if entry_depth >= depth:
+                if bound == self.EXACT:
+                    return value
+                if bound == self.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        original_alpha = alpha
+        best, best_card = -1, None
+        if first_card is not None:
+            playable ^= 1 << first_card
+        while first_card is not None or playable:
+            if first_card is not None:  # Primero la mejor jugada conocida del estado
+                card, first_card = first_card, None
+            else:
+                card = playable.bit_length() - 1  # Luego las cartas mas altas
+                playable ^= 1 << card
+            bit = 1 << card
+            if side == 0:
+                value = -self._search(first_mask ^ bit, second_mask, limit - card, 1, depth - 1, -beta, -alpha)
+            else:
+                value = -self._search(first_mask, second_mask ^ bit, limit - card, 0, depth - 1, -beta, -alpha)
+            if best_card is None or value > best:
+                best, best_card = value, card
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                break  # Poda
+
+        if best <= original_alpha:
+            bound = self.UPPER
+        elif best >= beta:
+            bound = self.LOWER
+        else:
+            bound = self.EXACT
+        self.table[key] = (best, bound, self.PROVEN_DEPTH if abs(best) == 1 else depth, best_card)
+        return best
@@ -0,0 +1,197 @@
+"""
+    Motor de búsqueda vectorizado (NumPy).
+
+    En lugar de recorrer el árbol con una llamada de Python por nodo, la partida se resuelve
+    nivel por nivel (en anchura): cada nivel es el conjunto de estados distintos que se alcanzan
+    luego de la misma cantidad de jugadas, representado como arrays de NumPy.
+"""
+import numpy as np
+
+from game import exceptions
+
+
+class VectorizedSolver:
+    """
+        Esta clase resuelve una partida en concreto nivel por nivel, con operaciones vectorizadas
+        sobre arrays de NumPy. Su interfaz y sus resultados son los mismos que los de
+        `game.solver.TranspositionSolver`, por lo que `CPUBrain` la utiliza de la misma forma.\n
+        El armado se hace en dos pasadas:\n
+        \t1. Hacia adelante: cada nivel guarda las manos (ambas en un único entero, ver `self._encode()`)
+        y el limite restante de sus estados. Los hijos de todo el nivel se generan de a una carta por vez
+        (una operación sobre todo el array por cada valor de carta), las cartas que superan el limite se
+        detectan comparando arrays y se cuentan como derrotas inmediatas, y los hijos repetidos (por ejemplo,
+        jugar 3 y luego 5, o 5 y luego 3) se unifican con `np.unique`.\n
+        \t2. Hacia atrás: desde el último nivel, el valor MiniMax de cada estado se calcula con
+        `np.maximum.at` / `np.minimum.at` sobre los valores de sus hijos, y sus victorias con `np.add.at`.\n
+        Como en `TranspositionSolver`, los valores son neutrales respecto del jugador CPU que los consulta
+        (el valor se expresa desde la perspectiva del primer jugador y las victorias de cada lado se guardan
+        por separado), y las victorias cuentan las hojas de cada subárbol (las de un estado alcanzable por
+        distintos caminos se suman una vez por camino).\n
+        La partida se resuelve completa la primera vez que se evalúa un estado (que pasa a ser la raiz), y
+        luego cada consulta es una búsqueda binaria dentro del nivel del estado.
+
+        Attributes:
+            hands (tuple): Manos originales (en orden) del primer y segundo jugador
+            limit (int): Limite máximo de la partida
+            levels (list): Niveles resueltos desde la raiz, cada uno es un diccionario con los arrays
+                `keys` (manos de cada estado, ordenadas), `value`, `first_wins` y `second_wins`
+            MAX_CARD (int): Valor máximo de carta soportado (ambas manos deben entrar en un entero de 64 bits)
+            MAX_WINS (int): Máximo de victorias representable (las victorias se acumulan en enteros de 64 bits)
+    """
+    MAX_CARD = 30
+    MAX_WINS = np.iinfo(np.int64).max
+
+    def __init__(self, first_cards: list, second_cards: list, limit: int):
+        self.hands = (list(first_cards), list(second_cards))
+        self.limit = limit
+        self.levels = []
+        self._shift = max(self.hands[0] + self.hands[1], default=0) + 1
+        if self._shift > self.MAX_CARD + 1:
+            raise exceptions.WrongGameConfigurationError(f'El motor \'vectorized\' soporta cartas de hasta {self.MAX_CARD}')
+        q_first, q_second = len(self.hands[0]), len(self.hands[1])
+        if max(self._max_leaves(q_first, q_second), self._max_leaves(q_second, q_first)) > self.MAX_WINS:
+            raise exceptions.WrongGameConfigurationError(f'El motor \'vectorized\' no soporta manos de {q_first} y {q_second} cartas: '
+                                                         'las victorias no entran en un entero de 64 bits (utilice el motor \'transposition\')')
+        self._root = None
+
+    @staticmethod
+    def _max_leaves(q_mover: int, q_other: int) -> int:
+        """
+            Cota superior de la cantidad de hojas de una partida (sin tener en cuenta el limite), que
+            acota a las victorias de cualquier estado: cada jugada disponible abre una rama por carta.
+
+            Args:
+                q_mover (int): Cantidad de cartas del jugador que mueve
+                q_other (int): Cantidad de cartas del otro jugador
+
+            Returns:
+                int: Cantidad de hojas del árbol completo
+        """
+        q_leaves = 1
+        while q_mover:
+            q_leaves *= q_mover
+            q_mover, q_other = q_other, q_mover - 1
+        return q_leaves
+
+    def __len__(self):
+        return sum(len(level['keys']) for level in self.levels)
+
+    def _encode(self, first_mask, second_mask):
+        """
+            Codifica las manos de ambos jugadores en un único entero (o array de enteros),
+            `first_mask` en los bits altos y `second_mask` en los bajos.
+        """
+        return (first_mask << self._shift) | second_mask
+
+    def discard_unreachable(self, state: tuple):
+        """
+            No se descarta nada: los niveles ya son arrays compactos, y se liberan junto con el solver.
+        """
+        pass
+
+    def evaluate(self, state: tuple) -> tuple:
+        """
+            Devuelve el resultado de un estado. Si el estado no pertenece a la partida resuelta
+            (o todavía no se resolvió ninguna), se resuelve la partida con el estado como raiz.
+
+            Args:
+                state (tuple): Estado a evaluar `(first_mask, second_mask, limit, side)`
+
+            Returns:
+                tuple: `(valor, victorias_primer_jugador, victorias_segundo_jugador)`, el valor
+                    es 1 si gana el primer jugador, -1 si gana el segundo y 0 si no hay ganador
+        """
+        first_mask, second_mask, limit, side = state
+        if limit < 0:
+            # El jugador que acaba de mover se pasó del limite, gana el que le toca mover
+            return (1, 1, 0) if side == 0 else (-1, 0, 1)
+
+        result = self._lookup(first_mask, second_mask, side)
+        if result is None:
+            self._solve(first_mask, second_mask, limit, side)
+            result = self._lookup(first_mask, second_mask, side)
+        return result
+
+    def _lookup(self, first_mask: int, second_mask: int, side: int) -> tuple:
+        if self._root is None:
+            return None
+        root_mask, root_side = self._root
+        if first_mask & ~root_mask or second_mask & ~root_mask:
+            return None
+
+        depth = bin(root_mask).count('1') - bin(first_mask | second_mask).count('1')
+        if depth >= len(self.levels) or (root_side + depth) % 2 != side:
+            return None
+        level = self.levels[depth]
+        key = self._encode(first_mask, second_mask)
+        index = int(np.searchsorted(level['keys'], key))
+        if index == len(level['keys']) or level['keys'][index] != key:
+            return None
+        return (int(level['value'][index]), int(level['first_wins'][index]), int(level['second_wins'][index]))
+
+    def _solve(self, first_mask: int, second_mask: int, limit: int, side: int):
+        """
+            Resuelve la partida completa desde un estado, nivel por nivel.
+        """
+        self._root = (first_mask | second_mask, side)
+        low_mask = (1 << self._shift) - 1
+        keys = np.array([self._encode(first_mask, second_mask)], dtype=np.int64)
+        limits = np.array([limit], dtype=np.int64)
+
+        # Pasada hacia adelante: se generan los estados de cada nivel
+        levels = []
+        mover_side = side
+        while keys.size:
+            movers = keys >> self._shift if mover_side == 0 else keys & low_mask
+            moved_shift = self._shift if mover_side == 0 else 0
+            dead = np.zeros(keys.size, dtype=np.int64)  # Cartas de quien mueve que superan el limite
+            parents, children, children_limits = [], [], []
+            for card in sorted(set(self.hands[mover_side])):
+                has_card = (movers >> card) & 1 == 1
+                fits = limits >= card
+                dead += has_card & ~fits
+                indexes = np.nonzero(has_card & fits)[0]
+                if indexes.size:
+                    parents.append(indexes)
+                    children.append(keys[indexes] ^ (1 << (card + moved_shift)))
+                    children_limits.append(limits[indexes] - card)
+
+            level = {'keys': keys, 'side': mover_side, 'dead': dead, 'empty': movers == 0}
+            if parents:
+                children = np.concatenate(children)
+                next_keys, first_index, inverse = np.unique(children, return_index=True, return_inverse=True)
+                level['parents'] = np.concatenate(parents)
+                level['children'] = inverse.reshape(-1)
+                keys, limits = next_keys, np.concatenate(children_limits)[first_index]
+            else:
+                keys = np.zeros(0, dtype=np.int64)
+            levels.append(level)
+            mover_side = 1 - mover_side
+
+        # Pasada hacia atrás: se propagan los valores y las victorias desde el último nivel
+        child_level = None
+        for level in reversed(levels):
+            q_states = level['keys'].size
+            dead = level['dead']
+            first_wins = np.zeros(q_states, dtype=np.int64)
+            second_wins = np.zeros(q_states, dtype=np.int64)
+            if level['side'] == 0:  # El primer jugador maximiza
+                value = np.where(dead > 0, -1, -2).astype(np.int8)
+                second_wins += dead
+            else:  # El segundo jugador minimiza
+                value = np.where(dead > 0, 1, 2).astype(np.int8)
+                first_wins += dead
+
+            if 'parents' in level:
+                parents, children = level.pop('parents'), level.pop('children')
+                reduce = np.maximum if level['side'] == 0 else np.minimum
+                reduce.at(value, parents, child_level['value'][children])
+                np.add.at(first_wins, parents, child_level['first_wins'][children])
+                np.add.at(second_wins, parents, child_level['second_wins'][children])
+            value[level.pop('empty')] = 0  # Hojas, no hay ganador
+
+            del level['dead'], level['side']
+            level.update(value=value, first_wins=first_wins, second_wins=second_wins)
+            child_level = level
+
+        self.levels = levels
@@ -5,6 +5,8 @@ import yaml
 from game.game_controller import Game
 from game.node import Node
 from game.cpu_controller import CPUBrain
+from game.endgame import EndgameTable
+from game.mcts_controller import MCTSBrain
 from game.human_controller import HumanController
 
 def load_game_config(path: str) -> dict:
@@ -15,7 +17,37 @@ def load_game_config(path: str) -> dict:
         except yaml.YAMLError as exc:
             raise exc
 
-def generate_player_mapping(players_info: dict, limit: int) -> dict:
+def load_brain_options(game_config: dict) -> dict:
+    return {
+        'search': game_config.get('search', 'minimax'),
+        'lazy': game_config.get('lazy_brain', False),
+        'brain_store': game_config.get('brain_store', 'objects'),
+        'workers': game_config.get('workers', 1),
+        'cache_path': game_config.get('cache_path'),
+        'dump_max_depth': game_config.get('dump_max_depth'),
+        'dump_max_nodes': game_config.get('dump_max_nodes'),
+        'dump_format': game_config.get('dump_format', 'text'),
+        'move_time_ms': game_config.get('move_time_ms'),
+        'endgame_cards': game_config.get('endgame_cards', EndgameTable.DEFAULT_MAX_CARDS),
+        'profile': game_config.get('profile_brain', False),
+        'opening_book': game_config.get('opening_book'),
+    }
+
+def load_mcts_options(game_config: dict) -> dict:
+    return {
+        'iterations': game_config.get('mcts_iterations'),
+        'move_time_ms': game_config.get('move_time_ms'),
+        'exploration': game_config.get('mcts_exploration', MCTSBrain.DEFAULT_EXPLORATION),
+        'dump_max_depth': game_config.get('dump_max_depth'),
+        'dump_max_nodes': game_config.get('dump_max_nodes'),
+        'dump_format': game_config.get('dump_format', 'text'),
+        'profile': game_config.get('profile_brain', False),
+    }
+
+def generate_player_mapping(players_info: dict, limit: int, brain_options: dict = None, mcts_options: dict = None) -> dict:
+    brain_options = brain_options or {}
+    mcts_options = mcts_options or {}
+
     aux = {}
     cpu_players = []
 
@@ -25,7 +57,10 @@ def generate_player_mapping(players_info: dict, limit: int) -> dict:
             aux[player]['instance'] = HumanController(who_am_i=player, alias=player_info['alias'])
         elif player_info['type'] == 'cpu':
             cpu_players.append(player)
-            aux[player]['instance'] = CPUBrain(who_am_i=player, main_root=Node(None, limit, 0, how_moves=None), alias=player_info['alias'], dump_dir=player_info['dump_location'])
+            aux[player]['instance'] = CPUBrain(who_am_i=player, main_root=Node(None, limit, 0, how_moves=None), alias=player_info['alias'], dump_dir=player_info['dump_location'], **brain_options)
+        elif player_info['type'] == 'mcts':
+            cpu_players.append(player)
+            aux[player]['instance'] = MCTSBrain(who_am_i=player, main_root=Node(None, limit, 0, how_moves=None), alias=player_info['alias'], dump_dir=player_info['dump_location'], **mcts_options)
 
     return aux, cpu_players
 
@@ -35,11 +70,13 @@ if __name__ == '__main__':
     game_config = load_game_config(yaml_location)
 
     # Levantar las instancias de los controladores
-    player_mapping, cpu_players = generate_player_mapping(game_config['players_info'], limit=game_config['limit'])
+    player_mapping, cpu_players = generate_player_mapping(game_config['players_info'], limit=game_config['limit'], brain_options=load_brain_options(game_config),\
+                                                          mcts_options=load_mcts_options(game_config))
 
     # Inicializar una instancia de Game
     game = Game(game_config['limit'], players_name_mapping=player_mapping, cpu_players=cpu_players,\
-                q_cards=game_config['deck_size'], lower_threshold_limit=game_config['lower_threshold_limit'], higher_threshold_limit=game_config['higher_threshold_limit'])
+                q_cards=game_config['deck_size'], lower_threshold_limit=game_config['lower_threshold_limit'], higher_threshold_limit=game_config['higher_threshold_limit'],\
+                events_location=game_config.get('events_location'), metrics_location=game_config.get('metrics_location'))
 
     # Iniciar el juego
     game.start()